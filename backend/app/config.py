@@ -14,18 +14,143 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "dev-secret-change-me"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440
+    # Authenticated users cached per worker (dropped on user save / delete in
+    # this worker; other workers see changes after the TTL) and decoded
+    # tokens memoized until their `exp`
+    AUTH_USER_CACHE_SIZE: int = 10000
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    
+    # Password hashing (bcrypt cost factor; existing hashes are upgraded to the
+    # configured cost at login). Hashing runs on its own thread pool; logins and
+    # registrations beyond MAX_QUEUE waiting hashes get 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
     
     # Cloudinary
     CLOUDINARY_CLOUD_NAME: Optional[str] = None
     CLOUDINARY_API_KEY: Optional[str] = None
     CLOUDINARY_API_SECRET: Optional[str] = None
     
+    # Image storage: cloudinary | local (files served by the backend at /images)
+    # | s3 (any S3-compatible store, e.g. MinIO). Images are keyed by their
+    # SHA-256, so duplicate uploads are stored once
+    IMAGE_STORAGE_BACKEND: str = "cloudinary"
+    IMAGE_STORAGE_DIR: Optional[str] = None  # local; default: backend/media
+    # Public URL prefix (default: BACKEND_URL/images for local, the bucket URL for s3)
+    IMAGE_STORAGE_BASE_URL: Optional[str] = None
+    S3_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None  # e.g. http://localhost:9000 for MinIO
+    S3_REGION: Optional[str] = None
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    
+    # Compact WebP derivatives (longest side in px) rendered in the background
+    # after each upload; history clients load these instead of the original
+    DERIVATIVES_ENABLED: bool = True
+    DERIVATIVE_WORKERS: int = 2
+    # Encoded originals waiting for rendering are held in memory: cap their total size
+    DERIVATIVE_MAX_QUEUE_BYTES: int = 256 * 1024 * 1024
+    THUMBNAIL_SIZE: int = 256
+    PREVIEW_SIZE: int = 1024
+    
+    # Image uploads run on their own thread pool; the timeout also bounds
+    # inference + upload when they run concurrently for one request
+    UPLOAD_WORKERS: int = 8
+    UPLOAD_TIMEOUT_SECONDS: float = 30.0
+    # Uploaded images are read once into memory (never spooled to disk) up to
+    # this size; larger files are rejected with 413
+    UPLOAD_MAX_BYTES: int = 20 * 1024 * 1024
+    
+    # Image persistence: "inline" uploads during the request; "outbox" spools the
+    # image to disk, answers immediately (image_url is null until uploaded) and
+    # uploads in the background with retries
+    IMAGE_PERSISTENCE_MODE: str = "inline"
+    OUTBOX_DIR: Optional[str] = None  # Default: backend/outbox
+    OUTBOX_CONCURRENCY: int = 4
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 2.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 300.0
+    # Uploads claimed longer than this are assumed abandoned and retried
+    OUTBOX_CLAIM_TIMEOUT_SECONDS: float = 600.0
+    
     # Gemini AI
     GEMINI_API_KEY: Optional[str] = None
     
+    # Model registry (checkpoints live in the repository's models/ directory)
+    MODEL_CHECKPOINT: str = "ensemble_model_best.pth"
+    # Poll the active checkpoint for changes and hot-swap it (0 = disabled)
+    MODEL_WATCH_INTERVAL_SECONDS: float = 0
+    # Comma-separated usernames allowed to activate model versions and read /metrics
+    MODEL_ADMIN_USERS: str = ""
+    # Serve GET /metrics without authentication (e.g. to a scraper on a private network)
+    METRICS_PUBLIC: bool = False
+    
+    # Inference engine: eager | torchscript | int8 | onnx
+    INFERENCE_BACKEND: str = "eager"
+    # Max validation accuracy drop (percentage points) allowed for the int8 engine
+    QUANTIZED_MAX_ACCURACY_DROP: float = 1.0
+    # Fewest held-out validation images the int8 accuracy report must be based on
+    QUANTIZED_MIN_EVAL_SAMPLES: int = 200
+    
+    # Inference (micro-batching)
+    INFERENCE_MAX_BATCH_SIZE: int = 8
+    INFERENCE_MAX_WAIT_MS: float = 10.0
+    
+    # Inference executor (0 threads = split CPU cores across all uvicorn
+    # worker processes and executor threads)
+    INFERENCE_WORKERS: int = 2
+    TORCH_INTRA_OP_THREADS: int = 0
+    
+    # Confidence cascade: the distilled student answers first and ResNet50 only
+    # runs when the student's softmax margin |p_pos - p_neg| is below the band
+    CASCADE_ENABLED: bool = False
+    CASCADE_STUDENT_CHECKPOINT: str = "student_model_best.pth"
+    CASCADE_UNCERTAINTY_MARGIN: float = 0.6
+    
+    # Admission gate run before inference: rejects tiny images, decompression
+    # bombs, colour photos (mean chroma, 0-1) and blank / low-contrast images
+    # (1st-99th percentile luminance range, 0-1)
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MIN_SIDE: int = 128
+    ADMISSION_MAX_PIXELS: int = 40_000_000
+    ADMISSION_MAX_CHROMA: float = 0.06
+    ADMISSION_MIN_DYNAMIC_RANGE: float = 0.08
+    
+    # Prediction result cache (keyed by image hash + model version)
+    PREDICTION_CACHE_SIZE: int = 1024
+    PREDICTION_CACHE_TTL_SECONDS: int = 3600
+    PREDICTION_CACHE_PERSISTENT: bool = False
+    
+    # Per-user latest prediction cache (chat personalisation, /prediction/latest).
+    # Entries are updated write-through by this worker; other workers' uploads
+    # show up after the TTL, or at once with WATCH (MongoDB change stream,
+    # needs a replica set)
+    LATEST_PREDICTION_CACHE_SIZE: int = 10000
+    LATEST_PREDICTION_CACHE_TTL_SECONDS: int = 30
+    LATEST_PREDICTION_CACHE_WATCH: bool = False
+    
+    # Upload mode: "sync" answers 201 with the result, "async" answers 202 with a
+    # job id (per request override: /prediction/upload?mode=async)
+    PREDICTION_UPLOAD_MODE: str = "sync"
+    PREDICTION_JOB_WORKERS: int = 4
+    PREDICTION_JOB_MAX_QUEUE: int = 1000
+    # Jobs left "running" longer than this (e.g. after a crash) are re-queued at startup
+    PREDICTION_JOB_STALE_SECONDS: int = 300
+    # Uploaded images of unfinished jobs (the job document only references
+    # them); must be shared by every process that recovers jobs
+    PREDICTION_JOB_SPOOL_DIR: Optional[str] = None  # Default: backend/job_spool
+    
+    # Batch prediction limits (/prediction/batch, zip entries count individually)
+    BATCH_MAX_FILES: int = 16
+    BATCH_MAX_TOTAL_BYTES: int = 50 * 1024 * 1024
+    
     # Server
     BACKEND_URL: str = "http://localhost:8000"
     FRONTEND_URL: str = "http://localhost:3000"
+    # Uvicorn worker processes (mmap'd model weights are shared between them)
+    WEB_CONCURRENCY: int = 1
     
     class Config:
         env_file = ".env"
@@ -5,30 +5,38 @@ from .schemas import (
     User,
     Prediction,
     ChatHistory,
+    PredictionCacheEntry,
+    PredictionJob,
     UserRegister,
     UserLogin,
     UserResponse,
     Token,
     PredictionCreate,
     PredictionResponse,
+    ModelActivate,
     ChatMessage,
     ChatResponse,
     APIResponse,
-    SeverityLevel
+    SeverityLevel,
+    JobStatus
 )
 
 __all__ = [
     "User",
     "Prediction",
     "ChatHistory",
+    "PredictionCacheEntry",
+    "PredictionJob",
     "UserRegister",
     "UserLogin",
     "UserResponse",
     "Token",
     "PredictionCreate",
     "PredictionResponse",
+    "ModelActivate",
     "ChatMessage",
     "ChatResponse",
     "APIResponse",
-    "SeverityLevel"
+    "SeverityLevel",
+    "JobStatus"
 ]
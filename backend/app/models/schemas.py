@@ -1,9 +1,10 @@
 """
 MongoDB Models for RAiCare
 """
-from beanie import Document
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from beanie import Document, Indexed, after_event, Replace, Save, SaveChanges, Update, Delete
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from enum import Enum
 
@@ -15,15 +16,29 @@ class SeverityLevel(str, Enum):
     SEVERE = "severe"
 
 
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
 # ============ USER MODEL ============
 class User(Document):
-    username: str = Field(..., unique=True, index=True)
-    email: EmailStr = Field(..., unique=True, index=True)
+    username: str
+    email: EmailStr
     hashed_password: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
         name = "users"
+        indexes = [
+            # Enforced by Mongo: registration is a single insert and a
+            # concurrent duplicate fails with DuplicateKeyError; the email
+            # index also serves login
+            IndexModel([("username", ASCENDING)], unique=True),
+            IndexModel([("email", ASCENDING)], unique=True)
+        ]
         
     class Config:
         json_schema_extra = {
@@ -32,20 +47,40 @@ class User(Document):
                 "email": "john@example.com"
             }
         }
+    
+    @after_event(Replace, Save, SaveChanges, Update, Delete)
+    def drop_cached_auth(self):
+        """Make get_current_user reload this user after it changes"""
+        # Imported here: app.utils.auth imports this module
+        from app.utils.auth import user_cache
+        user_cache.invalidate(str(self.id))
 
 
 # ============ PREDICTION MODEL ============
 class Prediction(Document):
-    user_id: str = Field(..., index=True)
-    image_url: str
+    user_id: str
+    image_url: Optional[str] = None  # None while the image is still in the upload outbox
+    # WebP derivatives, None until generated in the background
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     result_percentage: float = Field(..., ge=0, le=100)
     severity_level: SeverityLevel
+    model_version: Optional[str] = None
+    decided_by: Optional[str] = None  # Cascade stage: "student" or "resnet50"
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
         name = "predictions"
+        indexes = [
+            # History pages / latest: equality on user_id, newest first (_id
+            # breaks ties for keyset cursors), read in index order with no
+            # in-memory sort; also serves user_id-only filters
+            IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)])
+        ]
         
     class Config:
+        # Allow the `model_version` field (pydantic reserves the "model_" prefix)
+        protected_namespaces = ()
         json_schema_extra = {
             "example": {
                 "user_id": "user123",
@@ -58,13 +93,17 @@ class Prediction(Document):
 
 # ============ CHAT HISTORY MODEL ============
 class ChatHistory(Document):
-    user_id: str = Field(..., index=True)
+    user_id: str
     message: str
     response: str
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
         name = "chat_history"
+        indexes = [
+            # Chat history pages newest first; also serves clearing a user's history
+            IndexModel([("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)])
+        ]
         
     class Config:
         json_schema_extra = {
@@ -76,6 +115,54 @@ class ChatHistory(Document):
         }
 
 
+# ============ PREDICTION CACHE MODEL ============
+class PredictionCacheEntry(Document):
+    # Allow the `model_version` field (pydantic reserves the "model_" prefix)
+    model_config = ConfigDict(protected_namespaces=())
+    
+    key: Indexed(str, unique=True)
+    image_hash: str
+    model_version: str
+    result: dict
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set from PREDICTION_CACHE_TTL_SECONDS at write time, so changing the TTL
+    # never changes the index options (None on entries from older versions)
+    expires_at: Optional[datetime] = None
+    
+    class Settings:
+        name = "prediction_cache"
+        indexes = [
+            # Mongo TTL monitor removes entries once expires_at has passed
+            IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0)
+        ]
+
+
+# ============ PREDICTION JOB MODEL ============
+class PredictionJob(Document):
+    user_id: str
+    status: JobStatus = JobStatus.QUEUED
+    filename: Optional[str] = None
+    content_type: str
+    # Spool file of the buffered upload, removed once the job finishes (the
+    # image itself can exceed Mongo's 16 MB document limit)
+    image_file: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None  # Same payload as a synchronous upload
+    error: Optional[str] = None
+    attempts: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Settings:
+        name = "prediction_jobs"
+        indexes = [
+            # Restart recovery scans unfinished jobs oldest first
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+            # A user's jobs, newest first
+            IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)])
+        ]
+
+
 # ============ PYDANTIC SCHEMAS ============
 
 # User Schemas
@@ -110,14 +197,25 @@ class PredictionCreate(BaseModel):
 
 
 class PredictionResponse(BaseModel):
+    # Allow the `model_version` field (pydantic reserves the "model_" prefix)
+    model_config = ConfigDict(protected_namespaces=())
+    
     id: str
     user_id: str
-    image_url: str
+    image_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     result_percentage: float
     severity_level: SeverityLevel
+    model_version: Optional[str] = None
     timestamp: datetime
 
 
+# Model Registry Schemas
+class ModelActivate(BaseModel):
+    checkpoint: str = Field(..., min_length=1)
+
+
 # Chat Schemas
 class ChatMessage(BaseModel):
     message: str = Field(..., min_length=1)
@@ -4,9 +4,13 @@ Initialize routes package
 from .auth import router as auth_router
 from .prediction import router as prediction_router
 from .chat import router as chat_router
+from .metrics import router as metrics_router
+from .models import router as models_router
 
 __all__ = [
     "auth_router",
     "prediction_router",
-    "chat_router"
+    "chat_router",
+    "metrics_router",
+    "models_router"
 ]
@@ -2,8 +2,10 @@
 Authentication Routes - User Registration and Login
 """
 from fastapi import APIRouter, HTTPException, status
+from pymongo.errors import DuplicateKeyError
 from app.models import User, UserRegister, UserLogin, Token, UserResponse, APIResponse
-from app.utils import get_password_hash, verify_password, create_access_token
+from app.utils import create_access_token
+from app.services.password_hasher import password_hasher
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -17,31 +19,35 @@ async def register_user(user_data: UserRegister):
     - **email**: Valid email address
     - **password**: Password (minimum 6 characters)
     """
-    # Check if username already exists
-    existing_user = await User.find_one(User.username == user_data.username)
-    if existing_user:
+    # Create new user (bcrypt runs on the password hashing pool)
+    if password_hasher.is_full():
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # Check if email already exists
-    existing_email = await User.find_one(User.email == user_data.email)
-    if existing_email:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, please retry shortly"
         )
-    
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
     new_user = User(
         username=user_data.username,
         email=user_data.email,
         hashed_password=hashed_password
     )
     
-    await new_user.insert()
+    # One round-trip: the unique username / email indexes reject duplicates,
+    # including concurrent registrations of the same account
+    try:
+        await new_user.insert()
+    except DuplicateKeyError as e:
+        # keyPattern names the violated index; the message also contains the
+        # duplicate value, so only fall back to it on servers that omit keyPattern
+        key_pattern = (e.details or {}).get("keyPattern")
+        if key_pattern:
+            field = "email" if "email" in key_pattern else "username"
+        else:
+            field = "email" if "index: email" in str(e) else "username"
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered" if field == "email" else "Username already registered"
+        )
     
     return APIResponse(
         status="success",
@@ -74,13 +80,27 @@ async def login_user(user_credentials: UserLogin):
             detail="Invalid email or password"
         )
     
-    # Verify password
-    if not verify_password(user_credentials.password, user.hashed_password):
+    # Verify password (bcrypt runs on the password hashing pool)
+    if password_hasher.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many sign-ins in progress, please retry shortly"
+        )
+    if not await password_hasher.verify(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
         )
     
+    # Upgrade hashes made with a different BCRYPT_ROUNDS while we have the password
+    if password_hasher.needs_rehash(user.hashed_password):
+        try:
+            new_hash = await password_hasher.hash(user_credentials.password)
+            await user.set({User.hashed_password: new_hash})
+            password_hasher.rehashed += 1
+        except Exception as e:
+            print(f"⚠️  Password rehash for user {user.id} failed: {e}")
+    
     # Create access token
     access_token = create_access_token(data={"sub": str(user.id)})
     
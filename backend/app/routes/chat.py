@@ -1,11 +1,12 @@
 """
 Chat Routes - AI Chatbot for Personalized RA Recommendations
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from app.models import User, ChatHistory, ChatMessage, ChatResponse, APIResponse, Prediction
-from app.utils import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional
+from app.models import User, ChatHistory, ChatMessage, ChatResponse, APIResponse
+from app.utils import get_current_user, fetch_page
 from app.services.chatbot_service import get_chatbot_response, generate_welcome_message
+from app.services.latest_prediction_cache import latest_predictions
 
 router = APIRouter(prefix="/chat", tags=["Chatbot"])
 
@@ -23,9 +24,7 @@ async def send_chat_message(
     Response is personalized based on user's latest RA prediction and severity level
     """
     # Get user's latest prediction to personalize response
-    latest_prediction = await Prediction.find(
-        Prediction.user_id == str(current_user.id)
-    ).sort([("timestamp", -1)]).first_or_none()
+    latest_prediction = await latest_predictions.get(str(current_user.id))
     
     if not latest_prediction:
         raise HTTPException(
@@ -77,30 +76,34 @@ async def send_chat_message(
         )
 
 
+# Fields of a chat history row (besides _id and timestamp)
+CHAT_FIELDS = ["user_id", "message", "response"]
+
+
 @router.get("/history", response_model=APIResponse)
 async def get_chat_history(
-    limit: int = 20,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get user's chat history
+    Get user's chat history, newest first, one page at a time
     
-    - **limit**: Maximum number of messages to return (default: 20)
+    - **limit**: Maximum number of messages to return (default: 20, max: 100)
+    - **cursor**: `next_cursor` of the previous page (omit for the first page);
+      `next_cursor` is null on the last page
     """
-    # Fetch chat history for current user, sorted by timestamp (newest first)
-    chats = await ChatHistory.find(
-        ChatHistory.user_id == str(current_user.id)
-    ).sort(-ChatHistory.timestamp).limit(limit).to_list()
+    rows, next_cursor = await fetch_page(
+        ChatHistory, {"user_id": str(current_user.id)}, CHAT_FIELDS, limit, cursor
+    )
     
     chat_list = [
-        ChatResponse(
-            id=str(chat.id),
-            user_id=chat.user_id,
-            message=chat.message,
-            response=chat.response,
-            timestamp=chat.timestamp
-        ).dict()
-        for chat in chats
+        {
+            "id": str(row["_id"]),
+            **{field: row.get(field) for field in CHAT_FIELDS},
+            "timestamp": row["timestamp"]
+        }
+        for row in rows
     ]
     
     return APIResponse(
@@ -108,7 +111,8 @@ async def get_chat_history(
         message=f"Retrieved {len(chat_list)} chat message(s)",
         data={
             "chats": chat_list,
-            "total": len(chat_list)
+            "total": len(chat_list),
+            "next_cursor": next_cursor
         }
     )
 
@@ -119,9 +123,7 @@ async def get_welcome_message(current_user: User = Depends(get_current_user)):
     Get personalized welcome message based on user's latest prediction
     """
     # Get user's latest prediction
-    latest_prediction = await Prediction.find(
-        Prediction.user_id == str(current_user.id)
-    ).sort([("timestamp", -1)]).first_or_none()
+    latest_prediction = await latest_predictions.get(str(current_user.id))
     
     if not latest_prediction:
         return APIResponse(
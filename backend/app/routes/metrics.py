@@ -0,0 +1,73 @@
+"""
+Metrics Routes - Runtime Performance Counters
+"""
+from fastapi import APIRouter, Depends
+import os
+from app.config import settings
+from app.models import APIResponse
+from app.utils import memory_usage_mb, latency_metrics, auth_cache_stats, require_admin
+from app.services.prediction_service import prediction_service
+from app.services.inference_executor import inference_executor
+from app.services.prediction_cache import prediction_cache
+from app.services.latest_prediction_cache import latest_predictions
+from app.services.model_registry import model_registry
+from app.services.prediction_jobs import prediction_jobs
+from app.services.image_outbox import image_outbox
+from app.services.image_storage import image_storage
+from app.services.image_derivatives import image_derivatives
+from app.services.image_admission import image_admission
+from app.services.password_hasher import password_hasher
+
+# Admins only, unless METRICS_PUBLIC opens them to an unauthenticated scraper
+router = APIRouter(
+    prefix="/metrics",
+    tags=["Metrics"],
+    dependencies=[] if settings.METRICS_PUBLIC else [Depends(require_admin)]
+)
+
+
+@router.get("", response_model=APIResponse)
+async def get_metrics():
+    """
+    Get runtime performance metrics (users in MODEL_ADMIN_USERS only, unless
+    METRICS_PUBLIC is set)
+
+    - **process**: Memory of this worker process (RSS / PSS / shared / private MB)
+    - **model**: Serving model version, load time and peak RSS at boot
+    - **cascade**: Student -> ResNet50 escalation rate and latency saved
+    - **registry**: Hot-swap status and activation history
+    - **admission**: Images admitted / rejected before inference, by reason
+    - **inference**: Micro-batching queue depth and batch-size histogram
+    - **executor**: Inference worker pool utilisation
+    - **jobs**: Async prediction job queue depth and counters
+    - **image_storage**: Storage backend, images written and duplicate uploads skipped
+    - **image_derivatives**: Thumbnail / preview render queue depth and counters
+    - **image_outbox**: Images waiting for upload (backlog size and age) and retries
+    - **prediction_cache**: Result cache hit/miss/eviction counters
+    - **latest_prediction_cache**: Per-user latest prediction cache hit rate
+    - **auth**: Authenticated-user and decoded-token cache hit rates
+    - **password_hashing**: bcrypt pool utilisation, queue time and rehashes
+    - **latency**: Per-route, per-stage latency histograms (ms)
+    """
+    return APIResponse(
+        status="success",
+        message="Metrics retrieved",
+        data={
+            "process": {"pid": os.getpid(), "memory_mb": memory_usage_mb()},
+            "model": prediction_service.stats(),
+            "cascade": prediction_service.cascade_stats(),
+            "registry": model_registry.stats(),
+            "admission": image_admission.stats(),
+            "inference": prediction_service.batcher.stats(),
+            "executor": inference_executor.stats(),
+            "jobs": prediction_jobs.stats(),
+            "image_storage": image_storage.stats(),
+            "image_derivatives": image_derivatives.stats(),
+            "image_outbox": image_outbox.stats(),
+            "prediction_cache": prediction_cache.stats(),
+            "latest_prediction_cache": latest_predictions.stats(),
+            "auth": auth_cache_stats(),
+            "password_hashing": password_hasher.stats(),
+            "latency": latency_metrics.stats()
+        }
+    )
@@ -0,0 +1,57 @@
+"""
+Model Routes - Model Registry and Hot Swap
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.models import User, ModelActivate, APIResponse
+from app.utils import get_current_user, require_admin
+from app.services.model_registry import model_registry
+
+router = APIRouter(prefix="/models", tags=["Models"])
+
+
+@router.get("", response_model=APIResponse)
+async def list_models(current_user: User = Depends(get_current_user)):
+    """
+    List available checkpoints and the version currently serving predictions
+    """
+    return APIResponse(
+        status="success",
+        message="Model registry retrieved",
+        data={
+            "checkpoints": model_registry.checkpoints(),
+            "registry": model_registry.stats()
+        }
+    )
+
+
+@router.post("/activate", response_model=APIResponse)
+async def activate_model(
+    model_data: ModelActivate,
+    current_user: User = Depends(require_admin)
+):
+    """
+    Load a checkpoint in the background and hot-swap it in without downtime
+
+    Only the worker process serving this request swaps; with WEB_CONCURRENCY > 1
+    replace MODEL_CHECKPOINT on disk and let every worker's watcher pick it up.
+
+    - **checkpoint**: File name of a checkpoint in the models directory
+    """
+    try:
+        record = await model_registry.activate(model_data.checkpoint)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to activate model: {str(e)}"
+        )
+    
+    return APIResponse(
+        status="success",
+        message=f"Model {record['version']} activated in worker {record['pid']}",
+        data={"model": record}
+    )
@@ -1,122 +1,445 @@
 """
 Prediction Routes - Image Upload and Prediction History
 """
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from typing import List
-from app.models import User, Prediction, PredictionCreate, PredictionResponse, APIResponse, SeverityLevel
-from app.utils import get_current_user
-from app.services.cloudinary_service import upload_image_to_cloudinary
+import asyncio
+import io
+import json
+import zipfile
+from beanie import PydanticObjectId
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Tuple
+from app.config import settings
+from app.models import User, Prediction, PredictionJob, PredictionCreate, PredictionResponse, APIResponse, SeverityLevel
+from app.utils import get_current_user, get_stage_timer, StageTimer, read_upload, fetch_page
 from app.services.prediction_service import prediction_service
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_jobs import prediction_jobs, FINISHED_STATUSES
+from app.services.image_outbox import image_outbox
+from app.services.image_storage import image_storage
+from app.services.image_derivatives import image_derivatives
+from app.services.latest_prediction_cache import latest_predictions
+from app.services.image_admission import image_admission, ImageRejected
+from app.services.upload_pipeline import run_upload_pipeline, run_concurrently
 
 router = APIRouter(prefix="/prediction", tags=["Predictions"])
 
+ALLOWED_IMAGE_TYPES = ["image/jpeg", "image/jpg", "image/png"]
+ZIP_TYPES = ["application/zip", "application/x-zip-compressed"]
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+JOB_EVENTS_POLL_SECONDS = 1.0
+
+
+async def _admit(image_data: bytes, timer: StageTimer, filename: Optional[str] = None):
+    """
+    Run the admission gate off the event loop; rejected images never reach the model
+
+    Raises HTTPException 400 (unusable image) or 413 (byte / pixel limits).
+    """
+    if not image_admission.enabled:
+        return
+    try:
+        with timer.stage("admission"):
+            await asyncio.to_thread(image_admission.check, image_data)
+    except ImageRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE if e.too_large else status.HTTP_400_BAD_REQUEST,
+            detail=f"{filename}: {e}" if filename else str(e)
+        )
+
+
+def _expand_zip(data: bytes, max_bytes: int, max_files: int) -> List[Tuple[str, bytes]]:
+    """
+    Extract the PNG/JPEG entries of a zip archive
+
+    Raises ValueError once the decompressed images exceed `max_bytes` or there
+    are more than `max_files` of them; both are checked before decompressing
+    the entry, so archive bombs and archives of thousands of tiny images are
+    never inflated.
+    """
+    images = []
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        for info in archive.infolist():
+            name = info.filename.rsplit("/", 1)[-1]
+            if info.is_dir() or name.startswith(".") or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if len(images) >= max_files:
+                raise ValueError(f"A batch may contain at most {settings.BATCH_MAX_FILES} images")
+            if info.file_size > max_bytes:
+                raise ValueError("Archive content exceeds the batch size limit")
+            max_bytes -= info.file_size
+            images.append((info.filename, archive.read(info)))
+    return images
+
 
 @router.post("/upload", response_model=APIResponse, status_code=status.HTTP_201_CREATED)
 async def upload_prediction(
+    response: Response,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    mode: Literal["sync", "async"] = Query(settings.PREDICTION_UPLOAD_MODE),
+    current_user: User = Depends(get_current_user),
+    timer: StageTimer = Depends(get_stage_timer)
 ):
     """
     Upload X-ray image and run RA prediction using AI model
     
     - **file**: X-ray image file (JPG, JPEG, PNG)
+    - **mode**: `sync` waits for the result (201); `async` answers 202 with a job id
+      right after buffering the image - poll `/prediction/jobs/{id}` or stream
+      `/prediction/jobs/{id}/events`
+    
+    Blank, tiny, colour or oversized images are rejected (400 / 413) by the
+    admission gate before inference. Per-stage durations are returned in the
+    `Server-Timing` header.
     """
     # Validate file type
-    if file.content_type not in ["image/jpeg", "image/jpg", "image/png"]:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only JPG, JPEG, and PNG images are allowed"
+    with timer.stage("validate"):
+        if file.content_type not in ALLOWED_IMAGE_TYPES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only JPG, JPEG, and PNG images are allowed"
+            )
+    
+    # Single buffer shared by hashing, decoding and storage
+    with timer.stage("read"):
+        image_data = await read_upload(file, settings.UPLOAD_MAX_BYTES)
+    
+    await _admit(image_data, timer)
+    
+    if mode == "async":
+        if prediction_jobs.is_full():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Prediction queue is full, please retry later"
+            )
+        
+        try:
+            with timer.stage("db"):
+                job = await prediction_jobs.submit(
+                    str(current_user.id), image_data, file.filename, file.content_type
+                )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to queue prediction: {str(e)}"
+            )
+        
+        response.status_code = status.HTTP_202_ACCEPTED
+        timer.handler_done()
+        return APIResponse(
+            status="success",
+            message="Prediction accepted for processing",
+            data=_job_payload(job)
         )
     
     try:
-        # Run AI prediction on the image
-        prediction_result = prediction_service.predict_image(file)
+        data = await run_upload_pipeline(str(current_user.id), image_data, timer)
         
-        # Reset file pointer for Cloudinary upload
-        await file.seek(0)
+        timer.handler_done()
+        return APIResponse(
+            status="success",
+            message="Prediction completed and saved successfully",
+            data=data
+        )
         
-        # Upload image to Cloudinary
-        image_url = await upload_image_to_cloudinary(file)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process prediction: {str(e)}"
+        )
+
+
+def _job_payload(job: PredictionJob) -> dict:
+    """Public view of a prediction job (never includes the buffered image)"""
+    job_id = str(job.id)
+    return {
+        "job_id": job_id,
+        "status": job.status.value,
+        "status_url": f"/prediction/jobs/{job_id}",
+        "events_url": f"/prediction/jobs/{job_id}/events",
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+async def _get_user_job(job_id: str, current_user: User) -> PredictionJob:
+    """Load a job owned by the current user or raise 404"""
+    try:
+        job = await PredictionJob.get(PydanticObjectId(job_id))
+    except Exception:
+        job = None
+    
+    if job is None or job.user_id != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Prediction job not found"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=APIResponse)
+async def get_prediction_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status (and, once completed, the result) of an async prediction job
+    """
+    job = await _get_user_job(job_id, current_user)
+    
+    return APIResponse(
+        status="success",
+        message=f"Prediction job {job.status.value}",
+        data=_job_payload(job)
+    )
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_prediction_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Server-sent events stream of an async prediction job
+    
+    Emits one event per status change (`queued`, `running`, `completed`,
+    `failed`) with the job payload as JSON data, and closes once the job finishes.
+    """
+    job = await _get_user_job(job_id, current_user)
+    
+    async def events():
+        current = job
+        last_status = None
+        while current is not None:
+            if current.status != last_status:
+                last_status = current.status
+                yield f"event: {current.status.value}\ndata: {json.dumps(_job_payload(current))}\n\n"
+            if current.status in FINISHED_STATUSES:
+                return
+            # Woken immediately by this process' workers; the timeout also
+            # picks up jobs run by other worker processes
+            await prediction_jobs.wait_for_update(job_id, timeout=JOB_EVENTS_POLL_SECONDS)
+            current = await PredictionJob.get(job.id)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/batch", response_model=APIResponse, status_code=status.HTTP_201_CREATED)
+async def batch_prediction(
+    files: List[UploadFile] = File(...),
+    current_user: User = Depends(get_current_user),
+    timer: StageTimer = Depends(get_stage_timer)
+):
+    """
+    Upload a whole study (several X-ray views) and run RA prediction in one batch
+    
+    - **files**: X-ray images (JPG, JPEG, PNG) and/or zip archives of them
+    
+    Returns per-image results plus a study-level aggregate (most severe finding).
+    """
+    images: List[Tuple[str, bytes]] = []
+    total_bytes = 0
+    
+    for file in files:
+        filename = file.filename or "image"
+        is_zip = file.content_type in ZIP_TYPES or filename.lower().endswith(".zip")
         
-        # Map severity level to enum
-        severity_mapping = {
-            "none": SeverityLevel.NONE,
-            "mild": SeverityLevel.MILD,
-            "moderate": SeverityLevel.MODERATE,
-            "severe": SeverityLevel.SEVERE
-        }
+        with timer.stage("read"):
+            data = await read_upload(
+                file,
+                settings.BATCH_MAX_TOTAL_BYTES if is_zip else settings.UPLOAD_MAX_BYTES
+            )
+        
+        if is_zip:
+            try:
+                with timer.stage("unzip"):
+                    entries = await asyncio.to_thread(
+                        _expand_zip,
+                        data,
+                        settings.BATCH_MAX_TOTAL_BYTES - total_bytes,
+                        settings.BATCH_MAX_FILES - len(images)
+                    )
+            except zipfile.BadZipFile:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"{filename} is not a valid zip archive"
+                )
+            except ValueError as e:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=str(e)
+                )
+        elif file.content_type in ALLOWED_IMAGE_TYPES:
+            entries = [(filename, data)]
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Only JPG, JPEG, and PNG images (or zip archives of them) are allowed"
+            )
         
-        # Save prediction to database
-        new_prediction = Prediction(
-            user_id=str(current_user.id),
-            image_url=image_url,
-            result_percentage=float(prediction_result["result_percentage"]),
-            severity_level=severity_mapping[prediction_result["severity_level"]]
+        images.extend(entries)
+        total_bytes += sum(len(content) for _, content in entries)
+        
+        if len(images) > settings.BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"A batch may contain at most {settings.BATCH_MAX_FILES} images"
+            )
+        if total_bytes > settings.BATCH_MAX_TOTAL_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"A batch may contain at most {settings.BATCH_MAX_TOTAL_BYTES} bytes of images"
+            )
+    
+    if not images:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No JPG, JPEG, or PNG images found in the upload"
         )
+    
+    # One unusable view rejects the whole study before any inference
+    await asyncio.gather(*[_admit(content, timer, filename) for filename, content in images])
+    
+    try:
+        # Serve repeated views from the cache, run the rest in one forward pass
+        model_version = prediction_service.model_version
+        with timer.stage("cache"):
+            image_hashes = [prediction_cache.image_hash(content) for _, content in images]
+            results = [await prediction_cache.get(image_hash, model_version) for image_hash in image_hashes]
+        cached = [result is not None for result in results]
+        
+        missing = [i for i, result in enumerate(results) if result is None]
         
-        print(f"DEBUG ROUTE - Saving prediction: {prediction_result['result_percentage']} ({type(prediction_result['result_percentage'])})")
+        prediction_ids = [PydanticObjectId() for _ in images]
         
-        await new_prediction.insert()
+        async def upload_all():
+            if image_outbox.enabled:
+                # Spool for background upload; image_url stays null until then
+                with timer.stage("spool"):
+                    await asyncio.gather(
+                        *[image_outbox.add(pid, content) for pid, (_, content) in zip(prediction_ids, images)]
+                    )
+                return [None] * len(images)
+            with timer.stage("upload"):
+                return await asyncio.gather(
+                    *[image_storage.save(content, image_hash) for (_, content), image_hash in zip(images, image_hashes)]
+                )
         
-        print(f"DEBUG ROUTE - Saved to DB: {new_prediction.result_percentage} ({type(new_prediction.result_percentage)})")
+        async def predict_missing():
+            if not missing:
+                return []
+            with timer.stage("inference"):
+                return await prediction_service.predict_images_async([images[i][1] for i in missing])
         
-        prediction_response = PredictionResponse(
-            id=str(new_prediction.id),
-            user_id=new_prediction.user_id,
-            image_url=new_prediction.image_url,
-            result_percentage=new_prediction.result_percentage,
-            severity_level=new_prediction.severity_level,
-            timestamp=new_prediction.timestamp
+        # Uploads overlap the forward pass; either failing cancels the other
+        fresh_results, image_urls = await run_concurrently(
+            predict_missing(), upload_all(), timeout=settings.UPLOAD_TIMEOUT_SECONDS
         )
+        with timer.stage("cache"):
+            for i, result in zip(missing, fresh_results):
+                results[i] = result
+                await prediction_cache.set(image_hashes[i], result["model_version"], result)
         
+        # Bulk insert all predictions of the study in one round-trip
+        new_predictions = [
+            Prediction(
+                id=prediction_id,
+                user_id=str(current_user.id),
+                image_url=image_url,
+                result_percentage=float(result["result_percentage"]),
+                severity_level=SeverityLevel(result["severity_level"]),
+                model_version=result.get("model_version", model_version),
+                decided_by=result.get("decided_by")
+            )
+            for prediction_id, image_url, result in zip(prediction_ids, image_urls, results)
+        ]
+        with timer.stage("db"):
+            await Prediction.insert_many(new_predictions)
+        latest_predictions.set(new_predictions[-1])
+        
+        # Thumbnails / previews are rendered in the background
+        for pred, (_, content), image_hash in zip(new_predictions, images, image_hashes):
+            image_derivatives.submit(pred.id, content, image_hash)
+        
+        prediction_list = [
+            {
+                "filename": filename,
+                "prediction": PredictionResponse(
+                    id=str(pred.id),
+                    user_id=pred.user_id,
+                    image_url=pred.image_url,
+                    thumbnail_url=pred.thumbnail_url,
+                    preview_url=pred.preview_url,
+                    result_percentage=pred.result_percentage,
+                    severity_level=pred.severity_level,
+                    model_version=pred.model_version,
+                    timestamp=pred.timestamp
+                ).dict(),
+                "ai_result": result,
+                "cached": was_cached
+            }
+            for (filename, _), pred, result, was_cached in zip(images, new_predictions, results, cached)
+        ]
+        
+        timer.handler_done()
         return APIResponse(
             status="success",
-            message="Prediction completed and saved successfully",
+            message=f"Batch prediction completed for {len(prediction_list)} image(s)",
             data={
-                "prediction": {
-                    "id": str(new_prediction.id),
-                    "user_id": new_prediction.user_id,
-                    "image_url": new_prediction.image_url,
-                    "result_percentage": float(new_prediction.result_percentage),
-                    "severity_level": new_prediction.severity_level.value,
-                    "timestamp": new_prediction.timestamp.isoformat()
-                },
-                "ai_result": prediction_result
+                "predictions": prediction_list,
+                "study": prediction_service.aggregate_study(results),
+                "total": len(prediction_list)
             }
         )
         
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process prediction: {str(e)}"
+            detail=f"Failed to process batch prediction: {str(e)}"
         )
 
 
+# Fields of a history row (besides _id and timestamp)
+HISTORY_FIELDS = [
+    "user_id", "image_url", "thumbnail_url", "preview_url",
+    "result_percentage", "severity_level", "model_version"
+]
+
+
 @router.get("/history", response_model=APIResponse)
 async def get_prediction_history(
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     """
-    Get user's prediction history
+    Get user's prediction history, newest first, one page at a time
+    
+    - **limit**: Maximum number of records to return (default: 10, max: 100)
+    - **cursor**: `next_cursor` of the previous page (omit for the first page)
     
-    - **limit**: Maximum number of records to return (default: 10)
+    `next_cursor` is null on the last page. Rows carry `thumbnail_url` (256px
+    WebP) and `preview_url` (1024px WebP) once generated; both are null until
+    then and `image_url` is the original.
     """
-    # Fetch predictions for current user, sorted by timestamp (newest first)
-    predictions = await Prediction.find(
-        Prediction.user_id == str(current_user.id)
-    ).sort(-Prediction.timestamp).limit(limit).to_list()
+    rows, next_cursor = await fetch_page(
+        Prediction, {"user_id": str(current_user.id)}, HISTORY_FIELDS, limit, cursor
+    )
     
     prediction_list = [
-        PredictionResponse(
-            id=str(pred.id),
-            user_id=pred.user_id,
-            image_url=pred.image_url,
-            result_percentage=pred.result_percentage,
-            severity_level=pred.severity_level,
-            timestamp=pred.timestamp
-        ).dict()
-        for pred in predictions
+        {
+            "id": str(row["_id"]),
+            **{field: row.get(field) for field in HISTORY_FIELDS},
+            "timestamp": row["timestamp"]
+        }
+        for row in rows
     ]
     
     return APIResponse(
@@ -124,7 +447,8 @@ async def get_prediction_history(
         message=f"Retrieved {len(prediction_list)} prediction(s)",
         data={
             "predictions": prediction_list,
-            "total": len(prediction_list)
+            "total": len(prediction_list),
+            "next_cursor": next_cursor
         }
     )
 
@@ -134,10 +458,8 @@ async def get_latest_prediction(current_user: User = Depends(get_current_user)):
     """
     Get user's most recent prediction
     """
-    # Fetch most recent prediction
-    latest_prediction = await Prediction.find(
-        Prediction.user_id == str(current_user.id)
-    ).sort([("timestamp", -1)]).first_or_none()
+    # Fetch most recent prediction (cached per user)
+    latest_prediction = await latest_predictions.get(str(current_user.id))
     
     if not latest_prediction:
         return APIResponse(
@@ -150,8 +472,11 @@ async def get_latest_prediction(current_user: User = Depends(get_current_user)):
         id=str(latest_prediction.id),
         user_id=latest_prediction.user_id,
         image_url=latest_prediction.image_url,
+        thumbnail_url=latest_prediction.thumbnail_url,
+        preview_url=latest_prediction.preview_url,
         result_percentage=latest_prediction.result_percentage,
         severity_level=latest_prediction.severity_level,
+        model_version=latest_prediction.model_version,
         timestamp=latest_prediction.timestamp
     )
     
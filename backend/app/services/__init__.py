@@ -1,11 +1,12 @@
 """
 Initialize services package
 """
-from .cloudinary_service import upload_image_to_cloudinary
+from .cloudinary_service import upload_image_to_cloudinary, upload_image_bytes_to_cloudinary
 from .chatbot_service import get_chatbot_response, generate_welcome_message
 
 __all__ = [
     "upload_image_to_cloudinary",
+    "upload_image_bytes_to_cloudinary",
     "get_chatbot_response",
     "generate_welcome_message"
 ]
@@ -0,0 +1,183 @@
+"""
+Batching Service - Dynamic Micro-Batching for Model Inference
+"""
+import asyncio
+from collections import Counter
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+class BatchingEngine:
+    """
+    Collect concurrent inference requests into micro-batches
+
+    Requests are queued and a single scheduler task drains the queue, closing a
+    batch once it holds `max_batch_size` items or `max_wait_ms` has elapsed since
+    its first item arrived. The whole batch is handed to `batch_fn` in one call
+    and each caller receives its own slice of the result.
+
+    When an `executor` is given, `batch_fn` runs on its worker pool and up to one
+    batch per worker is in flight; while every worker is busy new requests keep
+    queueing, so the next batch fills up instead of blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        executor=None
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.batch_size_histogram: Counter = Counter()
+        self.total_batches = 0
+        self.total_requests = 0
+
+    async def start(self):
+        """Start the scheduler task on the running event loop"""
+        if self._scheduler is None or self._scheduler.done():
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.executor.max_workers if self.executor else 1)
+            self._scheduler = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the scheduler and fail any requests still waiting in the queue"""
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            try:
+                await self._scheduler
+            except asyncio.CancelledError:
+                pass
+            self._scheduler = None
+
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(Exception("Inference engine stopped"))
+
+    async def submit(self, item: Any, timer=None) -> Any:
+        """
+        Queue a single item for batched inference
+
+        Args:
+            item: One model input (e.g. a preprocessed image tensor)
+            timer: Optional StageTimer; receives the "queue" wait and the
+                "forward" duration of the batch this item ran in
+
+        Returns:
+            The result slice belonging to this item
+        """
+        await self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, timer, perf_counter()))
+        return await future
+
+    async def _collect_batch(self, batch: List[Tuple[Any, asyncio.Future, Any, float]]):
+        """
+        Wait for the first request, then gather more until full or the window closes
+
+        Dequeued requests are appended to `batch` as they arrive, so the caller
+        still holds them if collection is cancelled halfway.
+        """
+        loop = asyncio.get_running_loop()
+        batch.append(await self._queue.get())
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        """Scheduler loop"""
+        while True:
+            # Only close a batch once a worker is free to run it
+            await self._slots.acquire()
+            batch = []
+            try:
+                await self._collect_batch(batch)
+            except BaseException:
+                self._slots.release()
+                # Already dequeued, so stop() cannot fail them: do it here
+                for _, future, _, _ in batch:
+                    if not future.done():
+                        future.set_exception(Exception("Inference engine stopped"))
+                raise
+
+            task = asyncio.create_task(self._process(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._on_batch_done)
+
+    def _on_batch_done(self, task: asyncio.Task):
+        self._in_flight.discard(task)
+        self._slots.release()
+
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future, Any, float]]):
+        """Run one batched call and distribute results to waiting callers"""
+        # Skip callers that gave up (e.g. client disconnected)
+        batch = [entry for entry in batch if not entry[1].cancelled()]
+        if not batch:
+            return
+
+        self.batch_size_histogram[len(batch)] += 1
+        self.total_batches += 1
+        self.total_requests += len(batch)
+
+        items = [item for item, _, _, _ in batch]
+        started = perf_counter()
+        try:
+            if self.executor is not None:
+                results = await self.executor.run(self.batch_fn, items)
+            else:
+                results = self.batch_fn(items)
+        except Exception as e:
+            for _, future, _, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        finished = perf_counter()
+        for (_, future, timer, submitted), result in zip(batch, results):
+            if timer is not None:
+                timer.add("queue", started - submitted)
+                timer.add("forward", finished - started)
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching metrics for throughput / latency tuning"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches_in_flight": len(self._in_flight),
+            "total_batches": self.total_batches,
+            "total_requests": self.total_requests,
+            "avg_batch_size": round(self.total_requests / self.total_batches, 2) if self.total_batches else 0.0,
+            "batch_size_histogram": {
+                str(size): count for size, count in sorted(self.batch_size_histogram.items())
+            }
+        }
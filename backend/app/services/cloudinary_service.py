@@ -1,11 +1,21 @@
 """
 Cloudinary Service - Image Upload Handler
 """
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 import cloudinary
 import cloudinary.uploader
 from fastapi import UploadFile
 from app.config import settings
 
+# Storage SDKs (Cloudinary, boto3) are blocking: run them off the event loop,
+# apart from the inference workers so slow uploads never hold up forward passes
+upload_executor = ThreadPoolExecutor(
+    max_workers=settings.UPLOAD_WORKERS,
+    thread_name_prefix="cloudinary"
+)
+
 
 def _ensure_cloudinary_config() -> None:
     """Ensure Cloudinary is configured before attempting upload."""
@@ -38,21 +48,59 @@ async def upload_image_to_cloudinary(file: UploadFile) -> str:
     Returns:
         str: Public URL of uploaded image
     """
+    # Read file content
+    contents = await file.read()
+    
+    return await upload_image_bytes_to_cloudinary(contents)
+
+
+def upload_bytes_blocking(contents: bytes, public_id: Optional[str] = None) -> dict:
+    """
+    Blocking Cloudinary upload, meant to run on `upload_executor`
+    
+    Args:
+        contents: Encoded image (JPG/PNG, or WebP derivatives)
+        public_id: Fixed asset id; an existing asset with this id is kept
+            instead of being uploaded again
+        
+    Returns:
+        dict: Cloudinary upload result (`secure_url`, `existing`, ...)
+    """
     try:
         _ensure_cloudinary_config()
-        # Read file content
-        contents = await file.read()
         
-        # Upload to Cloudinary
-        upload_result = cloudinary.uploader.upload(
+        options = {}
+        if public_id is not None:
+            options = {"public_id": public_id, "overwrite": False}
+        
+        # HTTP timeout so a hung request frees its thread even after the
+        # awaiting caller gave up
+        return cloudinary.uploader.upload(
             contents,
             folder="raicare_xrays",
             resource_type="image",
-            allowed_formats=["jpg", "jpeg", "png"]
+            allowed_formats=["jpg", "jpeg", "png", "webp"],
+            timeout=settings.UPLOAD_TIMEOUT_SECONDS,
+            **options
         )
         
-        # Return secure URL
-        return upload_result.get("secure_url")
-        
     except Exception as e:
         raise Exception(f"Failed to upload image to Cloudinary: {str(e)}")
+
+
+async def upload_image_bytes_to_cloudinary(contents: bytes) -> str:
+    """
+    Upload raw image bytes to Cloudinary and return the URL
+    
+    Args:
+        contents: Encoded image (JPG/PNG)
+        
+    Returns:
+        str: Public URL of uploaded image
+    """
+    # Upload to Cloudinary on the upload thread pool
+    loop = asyncio.get_running_loop()
+    upload_result = await loop.run_in_executor(upload_executor, upload_bytes_blocking, contents)
+    
+    # Return secure URL
+    return upload_result.get("secure_url")
@@ -0,0 +1,168 @@
+"""
+Image Derivatives - Background Thumbnail and Preview Generation
+"""
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from beanie import PydanticObjectId
+from PIL import Image
+
+from app.config import settings
+from app.models import Prediction
+from app.services.image_storage import image_storage
+from app.services.latest_prediction_cache import latest_predictions
+
+# Prediction field -> (variant name, longest side in px, WebP quality)
+DERIVATIVES = {
+    "preview_url": ("preview", settings.PREVIEW_SIZE, 80),
+    "thumbnail_url": ("thumb", settings.THUMBNAIL_SIZE, 70),
+}
+
+
+def render_derivatives(image_data: bytes) -> List[Tuple[str, str, bytes]]:
+    """
+    Downscale an X-ray into WebP derivatives (never upscaled, aspect ratio kept)
+
+    Each size is resized from the previous, larger one, so the original is
+    resampled only once (and JPEGs are decoded at a reduced DCT scale by
+    `Image.thumbnail`).
+
+    Args:
+        image_data: Encoded original image
+
+    Returns:
+        List of (Prediction field, variant name, WebP bytes), largest first
+    """
+    image = Image.open(io.BytesIO(image_data))
+    if image.mode.startswith("I"):
+        # 16-bit grayscale: scale to 8 bits (a plain convert clips to white)
+        image = image.point(lambda value: value / 257).convert("L")
+    elif image.mode not in ("L", "RGB"):
+        image = image.convert("RGB")
+
+    rendered = []
+    for field, (variant, size, quality) in sorted(DERIVATIVES.items(), key=lambda item: -item[1][1]):
+        image.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format="WEBP", quality=quality, method=4)
+        rendered.append((field, variant, buffer.getvalue()))
+    return rendered
+
+
+class ImageDerivativeQueue:
+    """
+    Generate and store compact derivatives of uploaded X-rays in the background
+
+    Saved predictions are queued after their insert; worker tasks render the
+    WebP derivatives on a dedicated thread pool (PIL releases the GIL while
+    resampling and encoding), store them next to the original under
+    `<original sha256>.<variant>.webp` and patch the Prediction's URLs.
+
+    The queue is in memory and bounded by the total size of the queued
+    originals (`max_queue_bytes`, uploads are up to UPLOAD_MAX_BYTES each):
+    when it is full, or after a restart, a prediction simply keeps
+    `thumbnail_url`/`preview_url` null and clients fall back to `image_url`.
+    """
+
+    def __init__(self, workers: int = 2, max_queue_bytes: int = 256 * 1024 * 1024):
+        self.workers = max(1, workers)
+        self.max_queue_bytes = max_queue_bytes
+        # Bytes of originals queued or being rendered
+        self.queued_bytes = 0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Metrics
+        self.generated = 0
+        self.failed = 0
+        self.dropped = 0
+        self.renders = 0
+        self.render_seconds = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.DERIVATIVES_ENABLED
+
+    async def start(self):
+        """Start the worker tasks and their render thread pool"""
+        if not self.enabled or self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="derivatives")
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """Cancel the workers; queued predictions keep their original image only"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, prediction_id: PydanticObjectId, image_data: bytes, digest: str):
+        """
+        Queue derivative generation for a saved prediction (never blocks)
+
+        Args:
+            prediction_id: Id of the inserted Prediction to patch
+            image_data: Encoded original image
+            digest: SHA-256 hex digest of `image_data`
+        """
+        if self._queue is None:
+            return
+        if self.queued_bytes + len(image_data) > self.max_queue_bytes:
+            self.dropped += 1
+            return
+        self.queued_bytes += len(image_data)
+        self._queue.put_nowait((prediction_id, image_data, digest))
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            prediction_id, image_data, digest = await self._queue.get()
+            try:
+                start = perf_counter()
+                rendered = await loop.run_in_executor(self._executor, render_derivatives, image_data)
+                self.render_seconds += perf_counter() - start
+                self.renders += 1
+
+                urls = await asyncio.gather(
+                    *[image_storage.save(data, digest, variant) for _, variant, data in rendered]
+                )
+                fields = {field: url for (field, _, _), url in zip(rendered, urls)}
+                await Prediction.find_one(Prediction.id == prediction_id).update({"$set": fields})
+                latest_predictions.patch(prediction_id, fields)
+                self.generated += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"⚠️  Derivatives for prediction {prediction_id} failed: {e}")
+            finally:
+                self.queued_bytes -= len(image_data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and generation counters"""
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queued_mb": round(self.queued_bytes / 1024 / 1024, 1),
+            "max_queue_mb": round(self.max_queue_bytes / 1024 / 1024, 1),
+            "generated": self.generated,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "avg_render_ms": round(self.render_seconds / self.renders * 1000, 2) if self.renders else None
+        }
+
+
+# Global image derivative queue instance
+image_derivatives = ImageDerivativeQueue(
+    workers=settings.DERIVATIVE_WORKERS,
+    max_queue_bytes=settings.DERIVATIVE_MAX_QUEUE_BYTES
+)
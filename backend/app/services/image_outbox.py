@@ -0,0 +1,274 @@
+"""
+Image Outbox - Durable Background Upload of Prediction Images
+"""
+import asyncio
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from beanie import PydanticObjectId
+
+from app.config import settings
+from app.models import Prediction
+from app.services.image_storage import image_storage
+from app.services.latest_prediction_cache import latest_predictions
+
+OUTBOX_DIR = Path(settings.OUTBOX_DIR) if settings.OUTBOX_DIR else Path(__file__).parent.parent.parent / "outbox"
+
+
+class ImageOutbox:
+    """
+    Spool directory of images waiting to be uploaded
+
+    The route writes the image to disk and saves the Prediction with
+    `image_url=None`; a background drainer uploads it and patches the URL.
+    State lives entirely in file names, so it survives restarts and can be
+    shared by several worker processes on one host:
+
+    - `<prediction_id>.<attempts>.pending` - waiting; mtime is the earliest
+      time of the next attempt (exponential backoff with jitter)
+    - `<prediction_id>.<attempts>.claimed` - being uploaded; claimed with an
+      atomic rename, and released again if the claim is older than
+      `claim_timeout` (its process died)
+    - `<prediction_id>.<attempts>.failed` - gave up after `max_attempts`
+
+    Entries whose Prediction does not exist yet are deferred; once older than
+    `claim_timeout` they are dropped as orphans (the request failed). An entry
+    is only dropped when the lookup succeeds: while Mongo is unreachable every
+    entry is deferred and kept.
+
+    Backlog age is taken from the prediction's ObjectId timestamp.
+    """
+
+    def __init__(
+        self,
+        directory: Path = OUTBOX_DIR,
+        concurrency: int = 4,
+        max_attempts: int = 8,
+        backoff_base: float = 2.0,
+        backoff_max: float = 300.0,
+        claim_timeout: float = 600.0,
+        scan_interval: float = 2.0
+    ):
+        self.directory = directory
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.claim_timeout = claim_timeout
+        self.scan_interval = scan_interval
+
+        self._drainer: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._uploads: Set[asyncio.Task] = set()
+
+        # Metrics
+        self.uploaded = 0
+        self.retries = 0
+        self.failed = 0
+        self.orphaned = 0
+        self.backlog: Dict[str, Any] = {"pending": 0, "uploading": 0, "failed": 0, "oldest_age_seconds": None}
+
+    @property
+    def enabled(self) -> bool:
+        return settings.IMAGE_PERSISTENCE_MODE == "outbox"
+
+    async def start(self):
+        """Start draining the spool directory (including entries left by a previous run)"""
+        if not self.enabled or self._drainer is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._wakeup = asyncio.Event()
+        self._drainer = asyncio.create_task(self._drain())
+
+    async def stop(self):
+        """Stop the drainer; interrupted uploads are picked up again after a restart"""
+        if self._drainer is not None:
+            self._drainer.cancel()
+            await asyncio.gather(self._drainer, *self._uploads, return_exceptions=True)
+            self._drainer = None
+
+    async def add(self, prediction_id: PydanticObjectId, image_data: bytes):
+        """
+        Durably spool an image before its Prediction is saved
+
+        Args:
+            prediction_id: Pre-assigned id of the Prediction to patch
+            image_data: Raw encoded image
+        """
+        await asyncio.to_thread(self._write, str(prediction_id), image_data)
+
+    def _write(self, prediction_id: str, image_data: bytes):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.directory / f"{prediction_id}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image_data)
+            f.flush()
+            os.fsync(f.fileno())
+        # Atomic publish: the drainer never sees a partially written image
+        os.replace(tmp_path, self.directory / f"{prediction_id}.0.pending")
+
+    def _scan(self) -> List[Tuple[float, Path]]:
+        """Release stale claims, refresh backlog stats and return due entries"""
+        now = time.time()
+        due, pending, claimed, failed, oldest = [], 0, 0, 0, None
+
+        for path in self.directory.iterdir():
+            prediction_id, _, state = path.name.partition(".")
+            if state.count(".") != 1:
+                continue  # Spool file still being written
+
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue  # Claimed or finished by another worker meanwhile
+
+            if state.endswith(".failed"):
+                failed += 1
+                continue
+
+            if state.endswith(".claimed"):
+                if now - mtime > self.claim_timeout:
+                    self._rename(path, "claimed", "pending")
+                claimed += 1
+            else:
+                pending += 1
+                if mtime <= now:
+                    due.append((mtime, path))
+
+            try:
+                created = PydanticObjectId(prediction_id).generation_time.timestamp()
+                oldest = created if oldest is None else min(oldest, created)
+            except Exception:
+                pass
+
+        self.backlog = {
+            "pending": pending,
+            "uploading": claimed,
+            "failed": failed,
+            "oldest_age_seconds": round(now - oldest, 1) if oldest is not None else None
+        }
+        return sorted(due)
+
+    @staticmethod
+    def _rename(path: Path, old_state: str, new_state: str) -> Optional[Path]:
+        target = path.with_name(path.name[: -len(old_state)] + new_state)
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            return None  # Someone else got there first
+        return target
+
+    async def _drain(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                due = await asyncio.to_thread(self._scan)
+                for _, path in due:
+                    if len(self._uploads) >= self.concurrency:
+                        break
+                    try:
+                        os.utime(path)  # Claim time, for stale-claim detection
+                    except FileNotFoundError:
+                        continue
+                    claimed = self._rename(path, "pending", "claimed")
+                    if claimed is None:
+                        continue
+                    task = asyncio.create_task(self._upload(claimed))
+                    self._uploads.add(task)
+                    task.add_done_callback(self._on_upload_done)
+            except Exception as e:
+                print(f"⚠️  Image outbox scan failed: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.scan_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_upload_done(self, task: asyncio.Task):
+        self._uploads.discard(task)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _defer(self, path: Path, attempts: int, delay: float):
+        """Release a claimed entry as pending, due again after `delay` seconds"""
+        prediction_id = path.name.split(".")[0]
+        retry_path = path.with_name(f"{prediction_id}.{attempts}.pending")
+        path.rename(retry_path)
+        due_at = time.time() + delay
+        os.utime(retry_path, (due_at, due_at))
+
+    async def _upload(self, path: Path):
+        prediction_id, attempts, _ = path.name.split(".")
+        attempts = int(attempts)
+
+        # The image is spooled before its Prediction is inserted (so a crash
+        # never leaves a prediction without its image); wait for the insert
+        try:
+            exists = await Prediction.find_one(Prediction.id == PydanticObjectId(prediction_id))
+        except Exception as e:
+            # Database unreachable: the prediction may well exist, keep the image
+            self._defer(path, attempts, self.scan_interval)
+            print(f"⚠️  Image outbox lookup failed: {e}")
+            return
+        if exists is None:
+            age = time.time() - PydanticObjectId(prediction_id).generation_time.timestamp()
+            if age > self.claim_timeout:
+                # The prediction was never saved (request failed): drop the image
+                path.unlink(missing_ok=True)
+                self.orphaned += 1
+            else:
+                self._defer(path, attempts, self.scan_interval)
+            return
+
+        attempts += 1
+        try:
+            image_data = await asyncio.to_thread(path.read_bytes)
+            image_url = await asyncio.wait_for(
+                image_storage.save(image_data),
+                timeout=settings.UPLOAD_TIMEOUT_SECONDS
+            )
+            await Prediction.find_one(Prediction.id == PydanticObjectId(prediction_id)).update(
+                {"$set": {"image_url": image_url}}
+            )
+            latest_predictions.patch(PydanticObjectId(prediction_id), {"image_url": image_url})
+        except Exception as e:
+            if attempts >= self.max_attempts:
+                self.failed += 1
+                path.rename(path.with_name(f"{prediction_id}.{attempts}.failed"))
+                print(f"[ERROR] Giving up on image for prediction {prediction_id} after {attempts} attempts: {e}")
+                return
+
+            # Exponential backoff with jitter; mtime marks when the entry is due again
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            self._defer(path, attempts, delay)
+            self.retries += 1
+            print(f"⚠️  Image upload for prediction {prediction_id} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+            return
+
+        path.unlink(missing_ok=True)
+        self.uploaded += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Backlog size and age plus upload counters"""
+        return {
+            "enabled": self.enabled,
+            "directory": str(self.directory),
+            **self.backlog,
+            "uploaded": self.uploaded,
+            "retries": self.retries,
+            "gave_up": self.failed,
+            "orphaned": self.orphaned
+        }
+
+
+# Global image outbox instance
+image_outbox = ImageOutbox(
+    concurrency=settings.OUTBOX_CONCURRENCY,
+    max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+    backoff_base=settings.OUTBOX_BACKOFF_BASE_SECONDS,
+    backoff_max=settings.OUTBOX_BACKOFF_MAX_SECONDS,
+    claim_timeout=settings.OUTBOX_CLAIM_TIMEOUT_SECONDS
+)
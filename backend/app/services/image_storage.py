@@ -0,0 +1,237 @@
+"""
+Image Storage - Pluggable, Content-Addressed Storage for Uploaded X-rays
+"""
+import asyncio
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Type
+
+from app.config import settings
+from app.services.cloudinary_service import upload_bytes_blocking, upload_executor
+
+IMAGE_STORAGE_DIR = (
+    Path(settings.IMAGE_STORAGE_DIR) if settings.IMAGE_STORAGE_DIR
+    else Path(__file__).parent.parent.parent / "media"
+)
+
+# Leading bytes -> (file extension, content type)
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": ("png", "image/png"),
+    b"\xff\xd8\xff": ("jpg", "image/jpeg"),
+}
+
+
+def image_type(data: bytes) -> Tuple[str, str]:
+    """File extension and content type of an encoded image"""
+    for signature, kind in IMAGE_SIGNATURES.items():
+        if data[:len(signature)] == signature:
+            return kind
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    return "bin", "application/octet-stream"
+
+
+class ImageStorage:
+    """
+    Base class for image stores
+
+    Images are stored under the SHA-256 of their content, so uploading the same
+    image twice stores it once and returns the same URL. `_put` runs on the
+    upload thread pool and reports whether the object was actually written.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        # Metrics
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_stored = 0
+
+    @staticmethod
+    def content_key(data: bytes, digest: Optional[str] = None, variant: Optional[str] = None) -> str:
+        """`<sha256>[.<variant>].<ext>` storage key of an image"""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        name = f"{digest}.{variant}" if variant else digest
+        return f"{name}.{image_type(data)[0]}"
+
+    async def save(self, data: bytes, digest: Optional[str] = None, variant: Optional[str] = None) -> str:
+        """
+        Store an image (once per distinct content) and return its public URL
+
+        Args:
+            data: Encoded image
+            digest: SHA-256 hex digest of `data`, if the caller already has it;
+                for a derivative, the digest of the original it was made from
+            variant: Derivative name (e.g. "thumb"), None for the original
+
+        Returns:
+            Public URL of the stored image
+        """
+        key = self.content_key(data, digest, variant)
+        loop = asyncio.get_running_loop()
+        url, written = await loop.run_in_executor(upload_executor, self._put, key, data)
+
+        if written:
+            self.stored += 1
+            self.bytes_stored += len(data)
+        else:
+            self.deduplicated += 1
+        return url
+
+    def _put(self, key: str, data: bytes) -> Tuple[str, bool]:
+        """Store `data` under `key` unless present; returns (url, written)"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend name and write / deduplication counters"""
+        return {
+            "backend": self.name,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "bytes_stored": self.bytes_stored
+        }
+
+
+class CloudinaryImageStorage(ImageStorage):
+    """Cloudinary CDN; the content hash is used as the asset's public id"""
+
+    name = "cloudinary"
+
+    def _put(self, key: str, data: bytes) -> Tuple[str, bool]:
+        # overwrite=False returns the existing asset instead of replacing it
+        result = upload_bytes_blocking(data, public_id=key.rsplit(".", 1)[0])
+        return result.get("secure_url"), not result.get("existing", False)
+
+
+class LocalImageStorage(ImageStorage):
+    """
+    Files under IMAGE_STORAGE_DIR, served by the backend at `/images`
+
+    Paths are sharded by hash prefix (`ab/abcdef....png`) to keep directories small.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Path = IMAGE_STORAGE_DIR, base_url: Optional[str] = None):
+        super().__init__()
+        self.directory = directory
+        self.base_url = (base_url or f"{settings.BACKEND_URL}/images").rstrip("/")
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _put(self, key: str, data: bytes) -> Tuple[str, bool]:
+        relative_path = f"{key[:2]}/{key}"
+        url = f"{self.base_url}/{relative_path}"
+        path = self.directory / relative_path
+        if path.exists():
+            return url, False
+
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        # Atomic publish: readers never see a partial image, and concurrent
+        # writers of the same content just replace identical bytes
+        os.replace(tmp_path, path)
+        return url, True
+
+
+class S3ImageStorage(ImageStorage):
+    """
+    S3-compatible object store (AWS S3, MinIO, ...)
+
+    Objects are written with `put_object` after a `head_object` existence check.
+    URLs use IMAGE_STORAGE_BASE_URL when set, otherwise path-style
+    `<endpoint>/<bucket>/<key>` (or the AWS virtual-host URL without an endpoint).
+    """
+
+    name = "s3"
+
+    def __init__(self, base_url: Optional[str] = None):
+        super().__init__()
+        try:
+            import boto3
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise Exception("boto3 is not installed. Run: pip install boto3")
+
+        if not settings.S3_BUCKET:
+            raise Exception("S3 image storage needs S3_BUCKET in the backend .env")
+
+        self.bucket = settings.S3_BUCKET
+        self.client_error = ClientError
+        # boto3 clients are thread-safe: one client for the whole upload pool
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            region_name=settings.S3_REGION,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+            config=Config(
+                connect_timeout=settings.UPLOAD_TIMEOUT_SECONDS,
+                read_timeout=settings.UPLOAD_TIMEOUT_SECONDS,
+                max_pool_connections=settings.UPLOAD_WORKERS
+            )
+        )
+
+        if base_url:
+            self.base_url = base_url.rstrip("/")
+        elif settings.S3_ENDPOINT_URL:
+            self.base_url = f"{settings.S3_ENDPOINT_URL.rstrip('/')}/{self.bucket}"
+        else:
+            region = settings.S3_REGION or "us-east-1"
+            self.base_url = f"https://{self.bucket}.s3.{region}.amazonaws.com"
+
+    def _put(self, key: str, data: bytes) -> Tuple[str, bool]:
+        object_key = f"raicare_xrays/{key}"
+        url = f"{self.base_url}/{object_key}"
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=object_key)
+            return url, False
+        except self.client_error as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                raise Exception(f"Failed to check image in S3: {str(e)}")
+
+        try:
+            self.client.put_object(
+                Bucket=self.bucket,
+                Key=object_key,
+                Body=data,
+                ContentType=image_type(data)[1]
+            )
+        except Exception as e:
+            raise Exception(f"Failed to upload image to S3: {str(e)}")
+        return url, True
+
+
+STORAGE_BACKENDS: Dict[str, Type[ImageStorage]] = {
+    CloudinaryImageStorage.name: CloudinaryImageStorage,
+    LocalImageStorage.name: LocalImageStorage,
+    S3ImageStorage.name: S3ImageStorage,
+}
+
+
+def create_image_storage(name: str) -> ImageStorage:
+    """
+    Build the image store selected by name
+
+    Args:
+        name: One of STORAGE_BACKENDS (cloudinary, local, s3)
+
+    Returns:
+        Ready-to-use ImageStorage
+    """
+    if name not in STORAGE_BACKENDS:
+        raise Exception(f"Unknown image storage backend '{name}'. Choose from: {', '.join(STORAGE_BACKENDS)}")
+
+    if name == CloudinaryImageStorage.name:
+        return CloudinaryImageStorage()
+    return STORAGE_BACKENDS[name](base_url=settings.IMAGE_STORAGE_BASE_URL)
+
+
+# Global image storage instance
+image_storage = create_image_storage(settings.IMAGE_STORAGE_BACKEND)
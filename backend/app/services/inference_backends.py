@@ -0,0 +1,270 @@
+"""
+Inference Backends - Eager PyTorch, TorchScript and ONNX Runtime Engines
+"""
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, Type
+
+import torch
+import torch.nn as nn
+from torchvision import models
+
+from app.config import settings
+
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+IMG_SIZE = 224
+MODELS_DIR = Path(__file__).parent.parent.parent.parent / "models"
+CHECKPOINT_NAME = settings.MODEL_CHECKPOINT
+
+
+class OptimizedModel(nn.Module):
+    """Optimized ResNet50 model for RA detection"""
+
+    def __init__(self, num_classes=2):
+        super(OptimizedModel, self).__init__()
+
+        # Use ResNet50 - same as training. No ImageNet weights: the trained
+        # checkpoint overwrites every parameter, so serving never needs the network
+        self.resnet = models.resnet50(weights=None)
+
+        # Replace classifier
+        self.resnet.fc = nn.Sequential(
+            nn.Dropout(0.5),
+            nn.Linear(2048, num_classes)
+        )
+
+    def forward(self, x):
+        return self.resnet(x)
+
+
+class StudentModel(nn.Module):
+    """ResNet18 student distilled from OptimizedModel (see distill_student_model.py)"""
+
+    def __init__(self, num_classes=2):
+        super(StudentModel, self).__init__()
+
+        self.resnet = models.resnet18(weights=None)
+
+        # Replace classifier
+        self.resnet.fc = nn.Sequential(
+            nn.Dropout(0.5),
+            nn.Linear(512, num_classes)
+        )
+
+    def forward(self, x):
+        return self.resnet(x)
+
+
+def load_checkpoint_model(checkpoint_path: Path, model_cls: Type[nn.Module] = OptimizedModel) -> nn.Module:
+    """
+    Build the model and load trained weights from a training checkpoint
+
+    The model skeleton is created on the meta device (no allocation or random
+    init) and the checkpoint is memory-mapped, so its tensors are assigned to the
+    model directly from the page cache instead of being copied into fresh memory.
+    """
+    try:
+        checkpoint = torch.load(checkpoint_path, map_location="cpu", mmap=True, weights_only=True)
+    except RuntimeError:
+        # Legacy (non-zipfile) checkpoints cannot be memory-mapped
+        checkpoint = torch.load(checkpoint_path, map_location="cpu", weights_only=True)
+
+    with torch.device("meta"):
+        model = model_cls(num_classes=2)
+    model.load_state_dict(checkpoint['model_state'], assign=True)
+    model.eval()
+    return model.to(DEVICE)
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a model artifact, used as its version"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InferenceBackend:
+    """
+    Base class for inference engines
+
+    A backend takes a float batch of shape (N, 3, IMG_SIZE, IMG_SIZE) and returns
+    raw logits of shape (N, 2) as a CPU tensor. `version` identifies the exact
+    artifact being served and changes whenever the file content changes.
+    """
+
+    name = "base"
+    artifact_suffix = ".pth"
+
+    def __init__(self, artifact_path: Path, intra_op_threads: int = 0):
+        self.artifact_path = artifact_path
+        self.intra_op_threads = intra_op_threads
+        self.version = f"{self.name}-{file_digest(artifact_path)[:12]}"
+
+    @classmethod
+    def artifact_for(cls, checkpoint_path: Path) -> Path:
+        """Path of the artifact this backend loads for a given training checkpoint"""
+        return checkpoint_path.with_suffix(cls.artifact_suffix)
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        raise NotImplementedError
+
+
+class EagerBackend(InferenceBackend):
+    """Plain eager-mode PyTorch"""
+
+    name = "eager"
+    artifact_suffix = ".pth"
+    model_cls: Type[nn.Module] = OptimizedModel
+
+    def __init__(self, artifact_path: Path, intra_op_threads: int = 0):
+        super().__init__(artifact_path, intra_op_threads)
+        self.model = load_checkpoint_model(artifact_path, self.model_cls)
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            return self.model(batch.to(DEVICE)).cpu()
+
+
+class StudentBackend(EagerBackend):
+    """Distilled ResNet18 that answers first in cascade mode"""
+
+    name = "student"
+    model_cls = StudentModel
+
+
+class TorchScriptBackend(InferenceBackend):
+    """Traced and frozen TorchScript module (see export_model.py)"""
+
+    name = "torchscript"
+    artifact_suffix = ".ts"
+    device = DEVICE
+
+    def __init__(self, artifact_path: Path, intra_op_threads: int = 0):
+        super().__init__(artifact_path, intra_op_threads)
+        self.model = torch.jit.load(str(artifact_path), map_location=self.device)
+        self.model.eval()
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            return self.model(batch.to(self.device)).cpu()
+
+
+class QuantizedBackend(TorchScriptBackend):
+    """
+    INT8 TorchScript module produced by quantize_model.py
+
+    The conv trunk is statically quantized and the fc head dynamically
+    quantized. Loading is refused unless the accompanying report was made for
+    this exact artifact (SHA-256), on at least QUANTIZED_MIN_EVAL_SAMPLES
+    held-out images, and shows an accuracy drop within
+    QUANTIZED_MAX_ACCURACY_DROP.
+    """
+
+    name = "int8"
+    artifact_suffix = ".int8.ts"
+    # Quantized kernels (fbgemm / x86) only exist on CPU, even on a CUDA host
+    device = torch.device("cpu")
+
+    @classmethod
+    def artifact_for(cls, checkpoint_path: Path) -> Path:
+        return checkpoint_path.with_name(checkpoint_path.stem + cls.artifact_suffix)
+
+    @classmethod
+    def report_for(cls, checkpoint_path: Path) -> Path:
+        """Path of the quantization report written next to the artifact"""
+        return cls.artifact_for(checkpoint_path).with_suffix(".json")
+
+    def __init__(self, artifact_path: Path, intra_op_threads: int = 0):
+        report_path = artifact_path.with_suffix(".json")
+        if not report_path.exists():
+            raise Exception(f"Quantization report not found at {report_path}. Run: python quantize_model.py")
+
+        with open(report_path, "r") as f:
+            self.report: Dict[str, Any] = json.load(f)
+
+        if self.report.get("artifact_sha256") != file_digest(artifact_path):
+            raise Exception(
+                f"Refusing to load INT8 model: {report_path.name} was not written for the current "
+                f"{artifact_path.name}. Run: python quantize_model.py"
+            )
+
+        eval_samples = self.report.get("eval_samples", 0)
+        if eval_samples < settings.QUANTIZED_MIN_EVAL_SAMPLES:
+            raise Exception(
+                f"Refusing to load INT8 model: accuracy was measured on {eval_samples} images, "
+                f"QUANTIZED_MIN_EVAL_SAMPLES={settings.QUANTIZED_MIN_EVAL_SAMPLES}"
+            )
+
+        accuracy_drop = self.report["accuracy_drop"]
+        if accuracy_drop > settings.QUANTIZED_MAX_ACCURACY_DROP:
+            raise Exception(
+                f"Refusing to load INT8 model: accuracy drop {accuracy_drop:.2f} points exceeds "
+                f"QUANTIZED_MAX_ACCURACY_DROP={settings.QUANTIZED_MAX_ACCURACY_DROP}"
+            )
+
+        torch.backends.quantized.engine = self.report.get("engine", "x86")
+        super().__init__(artifact_path, intra_op_threads)
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX export executed by ONNX Runtime's CPU provider"""
+
+    name = "onnx"
+    artifact_suffix = ".onnx"
+
+    def __init__(self, artifact_path: Path, intra_op_threads: int = 0):
+        super().__init__(artifact_path, intra_op_threads)
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise Exception("onnxruntime is not installed. Run: pip install onnxruntime")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(
+            str(artifact_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        outputs = self.session.run(None, {self.input_name: batch.cpu().numpy()})
+        return torch.from_numpy(outputs[0])
+
+
+BACKENDS: Dict[str, Type[InferenceBackend]] = {
+    EagerBackend.name: EagerBackend,
+    TorchScriptBackend.name: TorchScriptBackend,
+    QuantizedBackend.name: QuantizedBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+}
+
+
+def load_backend(name: str, checkpoint_path: Path, intra_op_threads: int = 0) -> InferenceBackend:
+    """
+    Load the inference engine selected by name
+
+    Args:
+        name: One of BACKENDS (eager, torchscript, int8, onnx)
+        checkpoint_path: Training checkpoint the artifact was exported from
+        intra_op_threads: Thread budget for runtimes that manage their own pool
+
+    Returns:
+        Ready-to-use InferenceBackend
+    """
+    if name not in BACKENDS:
+        raise Exception(f"Unknown inference backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+
+    backend_cls = BACKENDS[name]
+    artifact_path = backend_cls.artifact_for(checkpoint_path)
+    if not artifact_path.exists():
+        script = "quantize_model.py" if name == QuantizedBackend.name else f"export_model.py --formats {name}"
+        raise Exception(f"{name} artifact not found at {artifact_path}. Run: python {script}")
+
+    return backend_cls(artifact_path, intra_op_threads=intra_op_threads)
@@ -0,0 +1,99 @@
+"""
+Inference Executor - Dedicated Worker Pool for CPU-Bound Model Work
+"""
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+import torch
+
+from app.config import settings
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool that keeps decoding and forward passes off the event loop
+
+    PyTorch releases the GIL inside its kernels, so a small pool of threads gives
+    real parallelism. Each worker thread is pinned to its own intra-op thread
+    budget so that `processes * max_workers * intra_op_threads` never
+    oversubscribes the cores when several uvicorn workers share a node.
+    """
+
+    def __init__(self, max_workers: int = 2, intra_op_threads: int = 0, processes: int = 1):
+        self.max_workers = max(1, max_workers)
+        self.processes = max(1, processes)
+        # 0 = split the available cores evenly between every worker thread on the node
+        self.intra_op_threads = intra_op_threads or max(
+            1, (os.cpu_count() or 1) // (self.processes * self.max_workers)
+        )
+
+        # Also applies to work done on the main thread (model load / warm-up)
+        torch.set_num_threads(self.intra_op_threads)
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="inference",
+            initializer=self._init_worker
+        )
+
+        # Metrics
+        self.active = 0
+        self.pending = 0
+        self.completed = 0
+
+    def _init_worker(self):
+        """Apply the torch intra-op thread budget to each worker thread"""
+        torch.set_num_threads(self.intra_op_threads)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking callable on the pool and await its result
+
+        Args:
+            fn: Blocking function (e.g. preprocessing or a forward pass)
+
+        Returns:
+            Whatever `fn` returns
+        """
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(
+                self._pool, functools.partial(self._call, fn, *args, **kwargs)
+            )
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self.active += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.active -= 1
+
+    def shutdown(self):
+        """Wait for running jobs and release the worker threads"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Executor metrics"""
+        return {
+            "processes": self.processes,
+            "workers": self.max_workers,
+            "intra_op_threads": self.intra_op_threads,
+            "active": self.active,
+            "queued": max(0, self.pending - self.active),
+            "completed": self.completed
+        }
+
+
+# Global inference executor instance
+inference_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    intra_op_threads=settings.TORCH_INTRA_OP_THREADS,
+    processes=settings.WEB_CONCURRENCY
+)
@@ -0,0 +1,206 @@
+"""
+Latest Prediction Cache - Per-User Most Recent Prediction
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo.errors import OperationFailure
+
+from app.config import settings
+from app.models import Prediction
+
+
+class LatestPredictionCache:
+    """
+    Bounded LRU + TTL cache of each user's most recent Prediction
+
+    Chat personalisation (`/chat/send`, `/chat/welcome`) and `/prediction/latest`
+    read it instead of running a sorted query per request. Users without a
+    prediction are cached too (as None).
+
+    Writes are write-through: `set` is called right after a Prediction is
+    inserted and `patch` after its image / derivative URLs are filled in, so
+    this worker never serves a stale entry. Other workers see the change when
+    their entry expires, or immediately with `watch=True`, which follows the
+    predictions collection through a MongoDB change stream (replica sets only).
+
+    Cached Predictions are shared between requests and must not be mutated.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: int = 30, watch: bool = False):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.watch = watch
+
+        # user_id -> (expires_at, latest prediction or None), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Prediction]]]" = OrderedDict()
+        # prediction id -> user_id of cached predictions, for `patch`
+        self._owners: Dict[Any, str] = {}
+        self._watcher: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.writes = 0
+        self.remote_updates = 0
+
+    async def get(self, user_id: str) -> Optional[Prediction]:
+        """
+        Most recent prediction of a user
+
+        Args:
+            user_id: Owner of the predictions
+
+        Returns:
+            Latest Prediction, or None if the user has none
+        """
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            expires_at, prediction = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return prediction
+
+            self._drop(user_id)
+            self.expirations += 1
+
+        self.misses += 1
+        prediction = await Prediction.find(
+            Prediction.user_id == user_id
+        ).sort([("timestamp", -1)]).first_or_none()
+
+        # A concurrent write-through may have stored something newer meanwhile
+        if user_id not in self._entries:
+            self._put(user_id, prediction)
+        return prediction
+
+    def set(self, prediction: Prediction):
+        """Record a newly inserted prediction (kept only if newer than the cached one)"""
+        current = self._entries.get(prediction.user_id)
+        if current is not None and current[1] is not None and self._newer(current[1], prediction):
+            return
+        self._put(prediction.user_id, prediction)
+        self.writes += 1
+
+    def patch(self, prediction_id: Any, fields: Dict[str, Any]):
+        """
+        Apply a `$set` made to a prediction to its cached copy, if cached
+
+        Args:
+            prediction_id: Id of the updated Prediction
+            fields: Updated field values
+        """
+        user_id = self._owners.get(prediction_id)
+        entry = self._entries.get(user_id) if user_id is not None else None
+        if entry is None or entry[1] is None or entry[1].id != prediction_id:
+            return
+        self._entries[user_id] = (entry[0], entry[1].model_copy(update=fields))
+
+    def invalidate(self, user_id: Optional[str] = None):
+        """Drop one user's entry (None = drop all)"""
+        if user_id is None:
+            self._entries.clear()
+            self._owners.clear()
+        else:
+            self._drop(user_id)
+
+    @staticmethod
+    def _newer(a: Prediction, b: Prediction) -> bool:
+        """True if `a` sorts after `b` (timestamp, then id)"""
+        return (a.timestamp, str(a.id)) > (b.timestamp, str(b.id))
+
+    def _put(self, user_id: str, prediction: Optional[Prediction]):
+        if self.max_size == 0:
+            return
+
+        self._drop(user_id)
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, prediction)
+        if prediction is not None:
+            self._owners[prediction.id] = user_id
+
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._drop(evicted)
+            self.evictions += 1
+
+    def _drop(self, user_id: str):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None and entry[1] is not None:
+            self._owners.pop(entry[1].id, None)
+
+    async def start(self):
+        """Start following other workers' writes (if `watch` is enabled)"""
+        if self.watch and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def _watch(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+        while True:
+            try:
+                async with Prediction.get_motor_collection().watch(pipeline, full_document="updateLookup") as stream:
+                    print("[OK] Latest prediction cache following the predictions change stream")
+                    async for change in stream:
+                        self._apply_change(change)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Standalone servers have no change streams: rely on the TTL
+                print(f"⚠️  Latest prediction cache cannot watch predictions ({e}); entries expire after {self.ttl_seconds}s")
+                return
+            except Exception as e:
+                print(f"⚠️  Latest prediction change stream interrupted: {e}")
+                await asyncio.sleep(5)
+
+    def _apply_change(self, change: Dict[str, Any]):
+        document = change.get("fullDocument")
+        if document is None:
+            return
+        prediction = Prediction.model_validate(document)
+
+        if change["operationType"] == "insert":
+            self.set(prediction)
+        else:
+            entry = self._entries.get(prediction.user_id)
+            if entry is None or entry[1] is None or entry[1].id != prediction.id:
+                return
+            self._entries[prediction.user_id] = (entry[0], prediction)
+        self.remote_updates += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "watching": self._watcher is not None and not self._watcher.done(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "writes": self.writes,
+            "remote_updates": self.remote_updates,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Global latest prediction cache instance
+latest_predictions = LatestPredictionCache(
+    max_size=settings.LATEST_PREDICTION_CACHE_SIZE,
+    ttl_seconds=settings.LATEST_PREDICTION_CACHE_TTL_SECONDS,
+    watch=settings.LATEST_PREDICTION_CACHE_WATCH
+)
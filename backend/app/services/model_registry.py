@@ -0,0 +1,166 @@
+"""
+Model Registry - Versioned Checkpoints with Zero-Downtime Hot Swap
+"""
+import asyncio
+import gc
+import os
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.services.inference_backends import BACKENDS, MODELS_DIR
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_service import PredictionService, prediction_service
+
+
+class ModelRegistry:
+    """
+    Track the checkpoints in MODELS_DIR and hot-swap the serving model
+
+    A new version is loaded and warmed up on a background thread while the
+    current one keeps serving, then swapped in with a single reference
+    assignment. The old backend is released as soon as its in-flight batches
+    finish, so two models are only resident for the duration of the swap.
+
+    The registry lives in one worker process: `activate` swaps only the worker
+    that runs it. With several workers, every worker's watcher picks up a
+    replaced MODEL_CHECKPOINT instead.
+    """
+
+    def __init__(self, service: PredictionService, models_dir: Path = MODELS_DIR):
+        self.service = service
+        self.models_dir = models_dir
+
+        self.status = "ready"
+        self.last_error: Optional[str] = None
+        self.history: List[Dict[str, Any]] = []
+
+        self._lock = asyncio.Lock()
+        self._watcher: Optional[asyncio.Task] = None
+        self._watched_stat: Optional[Tuple[float, int]] = None
+
+        if service.backend is not None:
+            self._record(service.checkpoint_name, service.model_version, service.load_seconds)
+
+    def checkpoints(self) -> List[Dict[str, Any]]:
+        """Checkpoints available for activation (the cascade student is not one)"""
+        active = self.service.checkpoint_name
+        return [
+            {
+                "checkpoint": path.name,
+                "size_mb": round(path.stat().st_size / (1024 * 1024), 2),
+                "modified_at": datetime.fromtimestamp(path.stat().st_mtime).isoformat(),
+                "active": path.name == active
+            }
+            for path in sorted(self.models_dir.glob("*.pth"))
+            if path.name != settings.CASCADE_STUDENT_CHECKPOINT
+        ]
+
+    async def activate(self, checkpoint_name: str) -> Dict[str, Any]:
+        """
+        Load a checkpoint in the background and swap it in once warmed up
+
+        Args:
+            checkpoint_name: File name of a checkpoint in MODELS_DIR
+
+        Returns:
+            The new activation record
+        """
+        if checkpoint_name not in {c["checkpoint"] for c in self.checkpoints()}:
+            raise ValueError(f"Checkpoint '{checkpoint_name}' not found in {self.models_dir}")
+
+        async with self._lock:
+            self.status = "loading"
+            self.last_error = None
+            start = perf_counter()
+            try:
+                # Default executor: model loading must not occupy inference workers
+                backend = await asyncio.to_thread(
+                    self.service.build_backend, self.models_dir / checkpoint_name
+                )
+            except Exception as e:
+                self.status = "ready"
+                self.last_error = str(e)
+                raise
+
+            previous = self.service.swap_backend(backend, checkpoint_name)
+            prediction_cache.invalidate(self.service.model_version)
+            if checkpoint_name == settings.MODEL_CHECKPOINT:
+                self._watched_stat = self._stat(checkpoint_name)
+
+            # Release the old weights once in-flight batches drop their reference
+            del previous
+            gc.collect()
+
+            self.status = "ready"
+            record = self._record(checkpoint_name, backend.version, perf_counter() - start)
+            print(f"[OK] Activated model {backend.version} ({checkpoint_name})")
+            return record
+
+    def _record(self, checkpoint_name: str, version: str, load_seconds: Optional[float]) -> Dict[str, Any]:
+        record = {
+            "checkpoint": checkpoint_name,
+            "version": version,
+            "pid": os.getpid(),
+            "load_seconds": round(load_seconds, 3) if load_seconds is not None else None,
+            "activated_at": datetime.utcnow().isoformat()
+        }
+        self.history.append(record)
+        return record
+
+    def _stat(self, checkpoint_name: str) -> Optional[Tuple[float, int]]:
+        # The file actually served: the .pth for eager, else its exported artifact
+        backend_cls = BACKENDS.get(settings.INFERENCE_BACKEND)
+        path = self.models_dir / checkpoint_name
+        if backend_cls is not None:
+            path = backend_cls.artifact_for(path)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        return stat.st_mtime, stat.st_size
+
+    async def start_watching(self):
+        """Hot-swap MODEL_CHECKPOINT whenever its served artifact on disk is replaced"""
+        if settings.MODEL_WATCH_INTERVAL_SECONDS <= 0 or self._watcher is not None:
+            return
+        self._watched_stat = self._stat(settings.MODEL_CHECKPOINT)
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def stop_watching(self):
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+            self._watcher = None
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(settings.MODEL_WATCH_INTERVAL_SECONDS)
+            current = self._stat(settings.MODEL_CHECKPOINT)
+            if current is None or current == self._watched_stat:
+                continue
+
+            self._watched_stat = current
+            try:
+                await self.activate(settings.MODEL_CHECKPOINT)
+            except Exception as e:
+                print(f"[ERROR] Hot swap of {settings.MODEL_CHECKPOINT} failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Registry state"""
+        return {
+            "pid": os.getpid(),
+            "status": self.status,
+            "active_checkpoint": self.service.checkpoint_name,
+            "active_version": self.service.model_version,
+            "last_error": self.last_error,
+            "history": self.history[-10:]
+        }
+
+
+# Global model registry instance
+model_registry = ModelRegistry(prediction_service)
@@ -0,0 +1,107 @@
+"""
+Password Hasher - bcrypt Off the Event Loop on a Bounded Worker Pool
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Dict
+
+from app.config import settings
+from app.utils.auth import get_password_hash, verify_password
+
+
+class PasswordHasher:
+    """
+    Dedicated thread pool for bcrypt hashing and verification
+
+    Each bcrypt call burns 100-300 ms of CPU (cost 12). bcrypt releases the GIL,
+    so running it here keeps the event loop serving predictions and chat during
+    a burst of logins, while `max_workers` caps how many cores hashing may take.
+    Requests beyond `max_queue` waiting calls are refused (`is_full`) instead
+    of piling up behind seconds of queued hashing.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 64, rounds: int = 12):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue
+        self.rounds = rounds
+
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+
+        # Metrics
+        self.active = 0
+        self.pending = 0
+        self.completed = 0
+        self.rehashed = 0
+        self.queue_seconds = 0.0
+        self.max_queue_seconds = 0.0
+        self.hash_seconds = 0.0
+
+    def is_full(self) -> bool:
+        """True when `max_queue` calls are already waiting for a worker"""
+        return self.pending - self.active >= self.max_queue
+
+    async def hash(self, password: str) -> str:
+        """Hash a password with the configured cost"""
+        return await self._run(get_password_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """Check a password against a stored hash"""
+        return await self._run(verify_password, password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True if a stored hash was made with a different cost than configured"""
+        try:
+            # $2b$<cost>$<salt+hash>
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    async def _run(self, fn: Callable[..., Any], *args) -> Any:
+        loop = asyncio.get_running_loop()
+        submitted = perf_counter()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(self._pool, self._call, fn, submitted, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def _call(self, fn: Callable[..., Any], submitted: float, *args) -> Any:
+        started = perf_counter()
+        waited = started - submitted
+        self.queue_seconds += waited
+        self.max_queue_seconds = max(self.max_queue_seconds, waited)
+        self.active += 1
+        try:
+            return fn(*args)
+        finally:
+            self.active -= 1
+            self.hash_seconds += perf_counter() - started
+
+    def shutdown(self):
+        """Release the worker threads"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool utilisation, queue time and hash time"""
+        return {
+            "workers": self.max_workers,
+            "rounds": self.rounds,
+            "active": self.active,
+            "queued": max(0, self.pending - self.active),
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rehashed": self.rehashed,
+            "avg_queue_ms": round(self.queue_seconds / self.completed * 1000, 2) if self.completed else None,
+            "max_queue_ms": round(self.max_queue_seconds * 1000, 2),
+            "avg_hash_ms": round(self.hash_seconds / self.completed * 1000, 2) if self.completed else None
+        }
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+    rounds=settings.BCRYPT_ROUNDS
+)
@@ -0,0 +1,173 @@
+"""
+Prediction Cache - Content-Addressed Cache of Model Results
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.models import PredictionCacheEntry
+
+
+class PredictionCache:
+    """
+    Bounded LRU + TTL cache of `predict_image` results
+
+    Entries are keyed by the SHA-256 of the raw upload bytes plus the model
+    version, so re-uploads and client retries skip decode, preprocessing and the
+    forward pass, and a new checkpoint never serves results of the old one.
+
+    With `persistent=True` misses fall through to the `prediction_cache` Mongo
+    collection, which survives restarts and is shared by all workers.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: int = 3600, persistent: bool = False):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self.persistent = persistent
+
+        # key -> (expires_at, result), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        # Metrics
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def image_hash(image_bytes: bytes) -> str:
+        """Content hash of the raw upload"""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    @staticmethod
+    def _key(image_hash: str, model_version: str) -> str:
+        return f"{model_version}:{image_hash}"
+
+    async def get(self, image_hash: str, model_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached prediction result
+
+        Args:
+            image_hash: SHA-256 of the raw image bytes
+            model_version: Version of the model currently serving
+
+        Returns:
+            Cached result dict, or None on a miss
+        """
+        key = self._key(image_hash, model_version)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(result)
+
+            del self._entries[key]
+            self.expirations += 1
+
+        if self.persistent:
+            result = await self._get_persistent(key)
+            if result is not None:
+                self._put(key, result)
+                self.persistent_hits += 1
+                return dict(result)
+
+        self.misses += 1
+        return None
+
+    async def set(self, image_hash: str, model_version: str, result: Dict[str, Any]):
+        """Store a prediction result in memory and, if enabled, in Mongo"""
+        key = self._key(image_hash, model_version)
+        self._put(key, dict(result))
+
+        if self.persistent:
+            await self._set_persistent(key, image_hash, model_version, result)
+
+    def invalidate(self, current_version: Optional[str] = None):
+        """
+        Drop in-memory entries
+
+        Args:
+            current_version: Keep only entries for this model version (None = drop all)
+        """
+        if current_version is None:
+            stale = list(self._entries)
+        else:
+            prefix = f"{current_version}:"
+            stale = [key for key in self._entries if not key.startswith(prefix)]
+
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+
+    def _put(self, key: str, result: Dict[str, Any]):
+        if self.max_size == 0:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def _get_persistent(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            entry = await PredictionCacheEntry.find_one(PredictionCacheEntry.key == key)
+        except Exception as e:
+            print(f"⚠️  Prediction cache lookup failed: {e}")
+            return None
+
+        # The Mongo TTL monitor only runs once a minute, so check expiry here too
+        if entry is None or entry.expires_at is None or entry.expires_at <= datetime.utcnow():
+            return None
+        return entry.result
+
+    async def _set_persistent(self, key: str, image_hash: str, model_version: str, result: Dict[str, Any]):
+        try:
+            await PredictionCacheEntry(
+                key=key,
+                image_hash=image_hash,
+                model_version=model_version,
+                result=result,
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+            ).insert()
+        except DuplicateKeyError:
+            # Another worker cached the same image first
+            pass
+        except Exception as e:
+            print(f"⚠️  Prediction cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache metrics"""
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self.persistent,
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_rate": round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+# Global prediction cache instance
+prediction_cache = PredictionCache(
+    max_size=settings.PREDICTION_CACHE_SIZE,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+    persistent=settings.PREDICTION_CACHE_PERSISTENT
+)
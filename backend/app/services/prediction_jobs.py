@@ -0,0 +1,257 @@
+"""
+Prediction Jobs - Background Worker Pool for Asynchronous Uploads
+"""
+import asyncio
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from beanie import PydanticObjectId
+
+from app.config import settings
+from app.models import JobStatus, PredictionJob
+from app.services.upload_pipeline import run_upload_pipeline
+from app.utils.timing import StageTimer, latency_metrics
+
+FINISHED_STATUSES = (JobStatus.COMPLETED, JobStatus.FAILED)
+JOB_SPOOL_DIR = (
+    Path(settings.PREDICTION_JOB_SPOOL_DIR) if settings.PREDICTION_JOB_SPOOL_DIR
+    else Path(__file__).parent.parent.parent / "job_spool"
+)
+
+
+class PredictionJobQueue:
+    """
+    Run uploads accepted with 202 on a pool of background worker tasks
+
+    Every job is stored in the `prediction_jobs` collection, and its buffered
+    image in the spool directory as `<job id>.img` (referenced by the job: an
+    upload may exceed Mongo's 16 MB document limit), so nothing is lost on a
+    restart: at startup queued jobs are re-enqueued, and jobs stuck in
+    "running" for longer than `stale_seconds` (their worker died) are reset to
+    "queued" first. A job is claimed with a
+    conditional status update, so it runs once even if several processes
+    recover it.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue: int = 1000,
+        stale_seconds: int = 300,
+        spool_dir: Path = JOB_SPOOL_DIR
+    ):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self.stale_seconds = stale_seconds
+        self.spool_dir = spool_dir
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # job id -> event set on the job's next status change (wakes SSE streams)
+        self._events: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+
+        # Metrics
+        self.running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.recovered = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    async def start(self):
+        """Start the worker tasks and re-enqueue unfinished jobs"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        await self._recover()
+
+    async def stop(self):
+        """Cancel the workers; interrupted jobs are recovered on the next start"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def is_full(self) -> bool:
+        return self._queue is not None and self._queue.qsize() >= self.max_queue
+
+    async def submit(self, user_id: str, image_data: bytes, filename: Optional[str], content_type: str) -> PredictionJob:
+        """
+        Persist a job for a validated upload and queue it
+
+        Args:
+            user_id: Owner of the prediction
+            image_data: Raw encoded image
+            filename: Original file name
+            content_type: Upload MIME type
+
+        Returns:
+            The stored job (status "queued")
+        """
+        await self.start()
+
+        job = PredictionJob(
+            id=PydanticObjectId(),
+            user_id=user_id,
+            filename=filename,
+            content_type=content_type
+        )
+        job.image_file = f"{job.id}.img"
+        # Spool first: a stored job always has its image
+        await asyncio.to_thread(self._spool, job.image_file, image_data)
+        try:
+            await job.insert()
+        except Exception:
+            self._unspool(job.image_file)
+            raise
+
+        self._queue.put_nowait(str(job.id))
+        self.submitted += 1
+        return job
+
+    async def wait_for_update(self, job_id: str, timeout: float) -> bool:
+        """
+        Wait until this process changes the job's status (False on timeout)
+
+        The job's event is dropped once its last waiter leaves, so jobs run by
+        other processes (never notified here) do not leak events.
+        """
+        event = self._events.setdefault(job_id, asyncio.Event())
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self._waiters[job_id] -= 1
+            if self._waiters[job_id] == 0:
+                del self._waiters[job_id]
+                if self._events.get(job_id) is event:
+                    del self._events[job_id]
+
+    def _spool(self, name: str, image_data: bytes):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.spool_dir / f"{name}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(image_data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.spool_dir / name)
+
+    def _unspool(self, name: Optional[str]):
+        if name:
+            (self.spool_dir / name).unlink(missing_ok=True)
+
+    def _notify(self, job_id: str):
+        event = self._events.pop(job_id, None)
+        if event is not None:
+            event.set()
+
+    async def _recover(self):
+        try:
+            stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+            await PredictionJob.find(
+                PredictionJob.status == JobStatus.RUNNING,
+                PredictionJob.started_at < stale_before
+            ).update({"$set": {"status": JobStatus.QUEUED}})
+
+            queued = await PredictionJob.find(
+                PredictionJob.status == JobStatus.QUEUED
+            ).sort("+created_at").to_list()
+        except Exception as e:
+            print(f"⚠️  Prediction job recovery skipped: {e}")
+            return
+
+        for job in queued:
+            self._queue.put_nowait(str(job.id))
+        self.recovered += len(queued)
+        if queued:
+            print(f"[OK] Re-queued {len(queued)} unfinished prediction job(s)")
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"[ERROR] Prediction job {job_id} crashed: {e}")
+
+    async def _claim(self, job_id: str) -> Optional[PredictionJob]:
+        """Atomically move a queued job to running; None if someone else has it"""
+        claimed = await PredictionJob.get_motor_collection().update_one(
+            {"_id": PydanticObjectId(job_id), "status": JobStatus.QUEUED.value},
+            {"$set": {"status": JobStatus.RUNNING.value, "started_at": datetime.utcnow()}, "$inc": {"attempts": 1}}
+        )
+        if claimed.modified_count != 1:
+            return None
+        return await PredictionJob.get(job_id)
+
+    async def _run(self, job_id: str):
+        job = await self._claim(job_id)
+        if job is None:
+            return
+
+        self._notify(job_id)
+        self.running += 1
+        self.wait_seconds += (job.started_at - job.created_at).total_seconds()
+        timer = StageTimer()
+        start = perf_counter()
+        try:
+            if not job.image_file:
+                raise Exception("The job has no uploaded image")
+            try:
+                image_data = await asyncio.to_thread((self.spool_dir / job.image_file).read_bytes)
+            except FileNotFoundError:
+                raise Exception("The uploaded image is no longer available")
+            # The job id doubles as the prediction id: a job re-run after its
+            # worker died between the insert and job.save() cannot save twice
+            job.result = await run_upload_pipeline(job.user_id, image_data, timer, prediction_id=job.id)
+            job.status = JobStatus.COMPLETED
+            self.completed += 1
+        except Exception as e:
+            job.status = JobStatus.FAILED
+            job.error = str(e)
+            self.failed += 1
+            print(f"[ERROR] Prediction job {job_id} failed: {e}")
+        finally:
+            self.running -= 1
+            self.run_seconds += perf_counter() - start
+
+        job.finished_at = datetime.utcnow()
+        await job.save()
+        self._unspool(job.image_file)
+        self._notify(job_id)
+
+        timer.finish()
+        latency_metrics.record("JOB /prediction/upload", timer)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and job counters"""
+        started = self.completed + self.failed
+        return {
+            "workers": self.workers,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "recovered": self.recovered,
+            "avg_wait_ms": round(self.wait_seconds / started * 1000, 2) if started else None,
+            "avg_run_ms": round(self.run_seconds / started * 1000, 2) if started else None
+        }
+
+
+# Global prediction job queue instance
+prediction_jobs = PredictionJobQueue(
+    workers=settings.PREDICTION_JOB_WORKERS,
+    max_queue=settings.PREDICTION_JOB_MAX_QUEUE,
+    stale_seconds=settings.PREDICTION_JOB_STALE_SECONDS
+)
@@ -1,100 +1,250 @@
 """
 Prediction Service - RA Detection Model Inference (ResNet50)
 """
+import asyncio
+import threading
 import torch
-import torch.nn as nn
-from torchvision import transforms, models
+from time import perf_counter
 from pathlib import Path
-from PIL import Image
-import numpy as np
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from app.config import settings
+from app.utils import peak_rss_mb
+from app.services.batching_service import BatchingEngine
+from app.services.inference_executor import inference_executor
+from app.services.preprocessing import image_preprocessor
+from app.services.inference_backends import (
+    IMG_SIZE,
+    MODELS_DIR,
+    InferenceBackend,
+    StudentBackend,
+    load_backend
+)
 
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-IMG_SIZE = 224
-MODELS_DIR = Path(__file__).parent.parent.parent.parent / "models"
 
+class PredictionService:
+    def __init__(self):
+        # Primary model engine (used for predictions). Replaced atomically by the
+        # model registry; readers take a local reference before using it
+        self.backend: Optional[InferenceBackend] = None
+        self.checkpoint_name: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.peak_rss_mb: Optional[float] = None
+
+        # Cascade mode: distilled student answers first, ResNet50 only when unsure
+        self.student: Optional[InferenceBackend] = None
+        self.uncertainty_margin = settings.CASCADE_UNCERTAINTY_MARGIN
+        # Batches run on several inference threads: counters update under a lock
+        self._cascade_lock = threading.Lock()
+        self.cascade_images = 0
+        self.cascade_escalated = 0
+        self.student_seconds = 0.0
+        self.teacher_seconds = 0.0
+
+        # Groups concurrent requests into one stacked forward pass
+        self.batcher = BatchingEngine(
+            self.predict_batch,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            executor=inference_executor
+        )
+
+        self._load_models()
+
+    def _load_models(self):
+        """Load ResNet50 model used for predictions with the configured backend"""
+
+        # Load ResNet50
+        resnet_path = MODELS_DIR / settings.MODEL_CHECKPOINT
+        if not resnet_path.exists():
+            print(f"[ERROR] ResNet50 model not found at {resnet_path}")
+            self.backend = None
+            return
+
+        try:
+            start = perf_counter()
+            self.backend = self.build_backend(resnet_path)
+            self.checkpoint_name = resnet_path.name
+            self.load_seconds = perf_counter() - start
+            self.peak_rss_mb = peak_rss_mb()
 
-class OptimizedModel(nn.Module):
-    """Optimized ResNet50 model for RA detection"""
+            rss = f"{self.peak_rss_mb:.0f} MB" if self.peak_rss_mb is not None else "n/a"
+            print(
+                f"[OK] ResNet50 model loaded successfully ({self.backend.name} backend) "
+                f"in {self.load_seconds:.2f}s, peak RSS {rss}"
+            )
+        except Exception as e:
+            print(f"[ERROR] Failed to load ResNet50 model: {e}")
+            self.backend = None
 
-    def __init__(self, num_classes=2):
-        super(OptimizedModel, self).__init__()
+        if settings.CASCADE_ENABLED:
+            self._load_student()
 
-        # Use ResNet50 - same as training
-        self.resnet = models.resnet50(pretrained=True)
+    def _load_student(self):
+        """Load the distilled student used as the first cascade stage"""
+        student_path = MODELS_DIR / settings.CASCADE_STUDENT_CHECKPOINT
+        if not student_path.exists():
+            print(f"[ERROR] Cascade student not found at {student_path}. Run: python distill_student_model.py")
+            return
 
-        # Replace classifier
-        self.resnet.fc = nn.Sequential(
-            nn.Dropout(0.5),
-            nn.Linear(2048, num_classes)
+        try:
+            self.student = StudentBackend(student_path)
+            self.student(torch.zeros(1, 3, IMG_SIZE, IMG_SIZE))
+            print(f"[OK] Cascade enabled: {self.student.version} escalates to ResNet50 below margin {self.uncertainty_margin}")
+        except Exception as e:
+            print(f"[ERROR] Failed to load cascade student: {e}")
+            self.student = None
+
+    def build_backend(self, checkpoint_path: Path) -> InferenceBackend:
+        """
+        Load a checkpoint with the configured backend and warm it up
+
+        Safe to call from a background thread while another backend is serving.
+        """
+        backend = load_backend(
+            settings.INFERENCE_BACKEND,
+            checkpoint_path,
+            intra_op_threads=inference_executor.intra_op_threads
         )
 
-    def forward(self, x):
-        return self.resnet(x)
+        # First call pays for lazy allocation / graph optimization
+        backend(torch.zeros(1, 3, IMG_SIZE, IMG_SIZE))
+        return backend
 
+    def swap_backend(self, backend: InferenceBackend, checkpoint_name: str) -> Optional[InferenceBackend]:
+        """
+        Atomically replace the serving backend
 
-class PredictionService:
-    def __init__(self):
-        # Primary model (used for predictions)
-        self.resnet_model = None
+        Batches already running keep their reference to the old backend and
+        finish on it; every batch started afterwards uses the new one.
 
-        self._load_models()
+        Returns:
+            The previous backend (drop it to release its memory)
+        """
+        previous = self.backend
+        self.backend = backend
+        self.checkpoint_name = checkpoint_name
+        return previous
 
-    def _load_models(self):
-        """Load ResNet50 model used for predictions"""
+    @property
+    def model_version(self) -> str:
+        """Version of the model (or cascade pipeline) currently serving predictions"""
+        if self.backend is None:
+            return "unloaded"
+        if self.student is not None:
+            return f"{self.student.version}>{self.backend.version}@{self.uncertainty_margin:g}"
+        return self.backend.version
 
-        # Load ResNet50
-        resnet_path = MODELS_DIR / "ensemble_model_best.pth"
-        if resnet_path.exists():
-            self.resnet_model = OptimizedModel(num_classes=2).to(DEVICE)
-            checkpoint = torch.load(resnet_path, map_location=DEVICE)
-            self.resnet_model.load_state_dict(checkpoint['model_state'])
-            self.resnet_model.eval()
-            print("[OK] ResNet50 model loaded successfully")
-        else:
-            print(f"[ERROR] ResNet50 model not found at {resnet_path}")
-            self.resnet_model = None
+    def stats(self) -> Dict[str, Any]:
+        """Loaded model metadata and startup cost"""
+        return {
+            "backend": self.backend.name if self.backend is not None else None,
+            "checkpoint": self.checkpoint_name,
+            "version": self.model_version,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "peak_rss_mb": round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None
+        }
 
-    def predict_image(self, image_file) -> Dict[str, Any]:
+    def cascade_stats(self) -> Dict[str, Any]:
         """
-        Make prediction on an uploaded image file using primary ResNet50 model
+        Escalation rate and latency saved by the cascade
+
+        Latency saved compares the measured mean cost per image (student for
+        every image, plus ResNet50 for escalated ones) with running ResNet50 on
+        every image.
+        """
+        if self.student is None:
+            return {"enabled": False}
+
+        images = self.cascade_images
+        escalation_rate = self.cascade_escalated / images if images else 0.0
+        student_ms = self.student_seconds / images * 1000 if images else None
+        teacher_ms = self.teacher_seconds / self.cascade_escalated * 1000 if self.cascade_escalated else None
+
+        latency_saved_ms = None
+        if student_ms is not None and teacher_ms is not None:
+            latency_saved_ms = round(teacher_ms - (student_ms + escalation_rate * teacher_ms), 2)
+
+        return {
+            "enabled": True,
+            "student_version": self.student.version,
+            "uncertainty_margin": self.uncertainty_margin,
+            "images": images,
+            "escalated": self.cascade_escalated,
+            "escalation_rate": round(escalation_rate, 4),
+            "student_ms_per_image": round(student_ms, 2) if student_ms is not None else None,
+            "teacher_ms_per_image": round(teacher_ms, 2) if teacher_ms is not None else None,
+            "latency_saved_ms_per_image": latency_saved_ms
+        }
+
+    def predict_batch(self, image_tensors: List[torch.Tensor]) -> List[Tuple[torch.Tensor, str, str]]:
+        """
+        Run one stacked forward pass over several preprocessed images
+
+        In cascade mode the student scores the whole batch first and only the
+        images whose softmax margin falls inside the uncertainty band are
+        re-run through ResNet50.
 
         Args:
-            image_file: FastAPI UploadFile object
+            image_tensors: List of tensors of shape (3, IMG_SIZE, IMG_SIZE)
 
         Returns:
-            Dict with prediction results from ResNet50 (primary model)
+            List of (softmax probability row, model version, deciding stage) -
+            one per input image; the stage is "student" or "resnet50"
         """
-        if self.resnet_model is None:
+        # Take one reference so a concurrent hot swap cannot split the batch
+        backend = self.backend
+        student = self.student
+        if backend is None:
             raise Exception("ResNet50 Model not loaded")
 
-        # Load and preprocess image
-        image = Image.open(image_file.file).convert("RGB")
-        transform = transforms.Compose([
-            transforms.Resize((IMG_SIZE, IMG_SIZE)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406],
-                               std=[0.229, 0.224, 0.225])
-        ])
-
-        image_tensor = transform(image).unsqueeze(0).to(DEVICE)
-
-        with torch.no_grad():
-            # Primary Model: ResNet50 (used for final prediction)
-            outputs = self.resnet_model(image_tensor)
-
-            # Get probabilities
-            probs = torch.softmax(outputs, dim=1)
-
-            # Get prediction (1 = RA Positive, 0 = RA Negative)
-            pred = torch.argmax(outputs, dim=1).item()
-            confidence_positive = probs[0, 1].item() * 100  # Confidence for positive class
-            confidence_negative = probs[0, 0].item() * 100  # Confidence for negative class
-            
-            print(f"DEBUG MODEL OUTPUT - ResNet50 outputs: {outputs}")
-            print(f"DEBUG MODEL OUTPUT - Probs: {probs}")
-            print(f"DEBUG MODEL OUTPUT - pred={pred}, conf_pos={confidence_positive:.2f}, conf_neg={confidence_negative:.2f}")
-            
+        batch = torch.stack(image_tensors)
+
+        if student is None:
+            probs = torch.softmax(backend(batch), dim=1)
+            return [(row, backend.version, "resnet50") for row in probs]
+
+        model_version = f"{student.version}>{backend.version}@{self.uncertainty_margin:g}"
+
+        start = perf_counter()
+        probs = torch.softmax(student(batch), dim=1)
+        student_seconds = perf_counter() - start
+
+        escalate = (probs[:, 1] - probs[:, 0]).abs() < self.uncertainty_margin
+        escalated = int(escalate.sum())
+        teacher_seconds = 0.0
+        if escalated:
+            start = perf_counter()
+            probs[escalate] = torch.softmax(backend(batch[escalate]), dim=1)
+            teacher_seconds = perf_counter() - start
+
+        with self._cascade_lock:
+            self.cascade_images += len(image_tensors)
+            self.cascade_escalated += escalated
+            self.student_seconds += student_seconds
+            self.teacher_seconds += teacher_seconds
+
+        return [
+            (row, model_version, "resnet50" if was_escalated else "student")
+            for row, was_escalated in zip(probs, escalate.tolist())
+        ]
+
+    def format_result(self, probs: torch.Tensor, model_version: str, decided_by: str = "resnet50") -> Dict[str, Any]:
+        """
+        Turn the softmax probabilities of one image into the prediction result
+
+        Args:
+            probs: Tensor of shape (2,) with [negative, positive] probabilities
+            model_version: Version of the model that produced `probs`
+            decided_by: Cascade stage that produced `probs` ("student" or "resnet50")
+
+        Returns:
+            Dict with prediction results from ResNet50 (primary model)
+        """
+        # Get prediction (1 = RA Positive, 0 = RA Negative)
+        pred = torch.argmax(probs).item()
+        confidence_positive = probs[1].item() * 100  # Confidence for positive class
+        confidence_negative = probs[0].item() * 100  # Confidence for negative class
+
         # Determine severity based on ResNet50 prediction (primary model)
         if pred == 0:  # Negative (No RA)
             severity_level = "none"
@@ -115,9 +265,86 @@ class PredictionService:
             "result_percentage": float(round(result_percentage, 2)),
             "severity_level": severity_level,
             "confidence": float(round(max(confidence_positive, confidence_negative), 2)),
-            "is_positive": pred == 1
+            "is_positive": pred == 1,
+            "model_version": model_version,
+            "decided_by": decided_by
+        }
+
+    def predict_image(self, image_file) -> Dict[str, Any]:
+        """
+        Make prediction on an uploaded image file using primary ResNet50 model
+
+        Args:
+            image_file: FastAPI UploadFile object
+
+        Returns:
+            Dict with prediction results from ResNet50 (primary model)
+        """
+        image_tensor = image_preprocessor(image_file.file)
+        return self.format_result(*self.predict_batch([image_tensor])[0])
+
+    async def predict_bytes_async(self, image_data: bytes, timer=None) -> Dict[str, Any]:
+        """
+        Make prediction on a buffered upload through the micro-batching engine
+
+        Decoding and the forward pass run on the inference executor so the event
+        loop stays free; concurrent callers share a single stacked forward pass.
+
+        Args:
+            image_data: Raw encoded image
+            timer: Optional StageTimer receiving decode / preprocess / queue / forward
+
+        Returns:
+            Dict with prediction results from ResNet50 (primary model)
+        """
+        if self.backend is None:
+            raise Exception("ResNet50 Model not loaded")
+
+        image_tensor = await inference_executor.run(image_preprocessor, image_data, timer)
+        return self.format_result(*await self.batcher.submit(image_tensor, timer))
+
+    async def predict_images_async(self, images: List[bytes]) -> List[Dict[str, Any]]:
+        """
+        Make predictions for several images (e.g. one study) in a single forward pass
+
+        Images are decoded in parallel on the inference executor, then stacked
+        into one batch.
+
+        Args:
+            images: Raw encoded images
+
+        Returns:
+            List of prediction result dicts, in input order
+        """
+        if self.backend is None:
+            raise Exception("ResNet50 Model not loaded")
+
+        image_tensors = await asyncio.gather(
+            *[inference_executor.run(image_preprocessor, data) for data in images]
+        )
+        outputs = await inference_executor.run(self.predict_batch, list(image_tensors))
+        return [self.format_result(*output) for output in outputs]
+
+    @staticmethod
+    def aggregate_study(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combine per-image results of one study into a study-level result
+
+        The study takes the most severe finding among its views.
+        """
+        severity_order = ["none", "mild", "moderate", "severe"]
+        percentages = [r["result_percentage"] for r in results]
+        positives = [r for r in results if r["is_positive"]]
+
+        return {
+            "images": len(results),
+            "positive_images": len(positives),
+            "is_positive": bool(positives),
+            "severity_level": max((r["severity_level"] for r in results), key=severity_order.index),
+            "max_result_percentage": max(percentages),
+            "mean_result_percentage": float(round(sum(percentages) / len(percentages), 2))
         }
 
 
 # Global prediction service instance
-prediction_service = PredictionService()
\ No newline at end of file
+prediction_service = PredictionService()
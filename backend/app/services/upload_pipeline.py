@@ -0,0 +1,148 @@
+"""
+Upload Pipeline - Inference, Image Storage and Persistence of One Upload
+"""
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+
+from beanie import PydanticObjectId
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.models import Prediction, SeverityLevel
+from app.services.image_outbox import image_outbox
+from app.services.image_storage import image_storage
+from app.services.image_derivatives import image_derivatives
+from app.services.latest_prediction_cache import latest_predictions
+from app.services.prediction_cache import prediction_cache
+from app.services.prediction_service import prediction_service
+from app.utils.timing import StageTimer
+
+
+async def run_concurrently(*aws: Awaitable[Any], timeout: float) -> List[Any]:
+    """
+    Await several operations together, failing fast
+
+    As soon as one raises, or `timeout` seconds pass, the others are cancelled
+    and the error is re-raised, so a failed upload does not wait for inference
+    (or vice versa).
+
+    Returns:
+        Results in argument order
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION)
+    finally:
+        # Also reached when the request itself is cancelled
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if task.exception() is not None:
+                raise task.exception()
+        raise Exception(f"Timed out after {timeout:g}s")
+
+    return [task.result() for task in tasks]
+
+
+async def _timed(timer: StageTimer, stage: str, aw: Awaitable[Any]) -> Any:
+    with timer.stage(stage):
+        return await aw
+
+
+async def run_upload_pipeline(
+    user_id: str,
+    image_data: bytes,
+    timer: StageTimer,
+    prediction_id: Optional[PydanticObjectId] = None
+) -> Dict[str, Any]:
+    """
+    Predict, store and record one validated, buffered upload
+
+    Shared by the synchronous `/prediction/upload` route and the background
+    prediction job workers.
+
+    Args:
+        user_id: Owner of the prediction
+        image_data: Raw encoded image (JPG/PNG)
+        timer: StageTimer receiving the duration of every stage
+        prediction_id: Id to save the Prediction under (default: a new one).
+            A retried job passes its own id, so a prediction saved by an
+            earlier attempt is returned instead of being inserted twice
+
+    Returns:
+        Response payload: saved prediction, raw AI result and cache flag
+    """
+    # Identical uploads (re-uploads, client retries) reuse the cached result
+    with timer.stage("read"):
+        image_hash = prediction_cache.image_hash(image_data)
+    model_version = prediction_service.model_version
+
+    with timer.stage("cache"):
+        prediction_result = await prediction_cache.get(image_hash, model_version)
+    cached = prediction_result is not None
+
+    prediction_id = prediction_id or PydanticObjectId()
+
+    if image_outbox.enabled:
+        # Durably spool the image; the outbox uploads it and patches image_url
+        upload = _timed(timer, "spool", image_outbox.add(prediction_id, image_data))
+    else:
+        # Store the image while the model runs: latency is
+        # max(inference, upload) instead of their sum
+        upload = _timed(timer, "upload", image_storage.save(image_data, image_hash))
+
+    if cached:
+        image_url, = await run_concurrently(upload, timeout=settings.UPLOAD_TIMEOUT_SECONDS)
+    else:
+        # Run AI prediction on the image (times decode / preprocess / queue / forward)
+        prediction_result, image_url = await run_concurrently(
+            prediction_service.predict_bytes_async(image_data, timer),
+            upload,
+            timeout=settings.UPLOAD_TIMEOUT_SECONDS
+        )
+        # Key by the version that actually produced the result (a hot swap
+        # may have happened while this request was queued)
+        with timer.stage("cache"):
+            await prediction_cache.set(image_hash, prediction_result["model_version"], prediction_result)
+
+    # Save prediction to database
+    new_prediction = Prediction(
+        id=prediction_id,
+        user_id=user_id,
+        image_url=image_url,
+        result_percentage=float(prediction_result["result_percentage"]),
+        severity_level=SeverityLevel(prediction_result["severity_level"]),
+        model_version=prediction_result.get("model_version", model_version),
+        decided_by=prediction_result.get("decided_by")
+    )
+
+    with timer.stage("db"):
+        try:
+            await new_prediction.insert()
+        except DuplicateKeyError:
+            # Saved by an earlier attempt of the same job
+            new_prediction = await Prediction.get(prediction_id)
+    latest_predictions.set(new_prediction)
+    
+    # Thumbnail / preview are rendered in the background
+    image_derivatives.submit(new_prediction.id, image_data, image_hash)
+
+    return {
+        "prediction": {
+            "id": str(new_prediction.id),
+            "user_id": new_prediction.user_id,
+            "image_url": new_prediction.image_url,
+            "thumbnail_url": new_prediction.thumbnail_url,
+            "preview_url": new_prediction.preview_url,
+            "result_percentage": float(new_prediction.result_percentage),
+            "severity_level": new_prediction.severity_level.value,
+            "model_version": new_prediction.model_version,
+            "timestamp": new_prediction.timestamp.isoformat()
+        },
+        "ai_result": prediction_result,
+        "cached": cached
+    }
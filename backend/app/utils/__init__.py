@@ -6,9 +6,15 @@ from .auth import (
     get_password_hash,
     create_access_token,
     decode_access_token,
-    get_current_user
+    get_current_user,
+    require_admin,
+    auth_cache_stats
 )
 from .database import init_db, close_db
+from .system import peak_rss_mb, memory_usage_mb
+from .timing import StageTimer, ServerTimingMiddleware, get_stage_timer, latency_metrics
+from .uploads import read_upload, keep_uploads_in_memory, UploadSizeLimitMiddleware
+from .pagination import fetch_page, encode_cursor, decode_cursor
 
 __all__ = [
     "verify_password",
@@ -16,6 +22,20 @@ __all__ = [
     "create_access_token",
     "decode_access_token",
     "get_current_user",
+    "require_admin",
+    "auth_cache_stats",
     "init_db",
-    "close_db"
+    "close_db",
+    "peak_rss_mb",
+    "memory_usage_mb",
+    "StageTimer",
+    "ServerTimingMiddleware",
+    "get_stage_timer",
+    "latency_metrics",
+    "read_upload",
+    "keep_uploads_in_memory",
+    "UploadSizeLimitMiddleware",
+    "fetch_page",
+    "encode_cursor",
+    "decode_cursor"
 ]
@@ -1,8 +1,10 @@
 """
 JWT Authentication Utilities
 """
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Hashable, Optional, Tuple
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
@@ -14,16 +16,109 @@ from app.models import User
 security = HTTPBearer()
 
 
+class AuthCache:
+    """
+    Bounded LRU cache whose entries expire after `ttl_seconds` or at their own
+    deadline, whichever comes first
+
+    Used for authenticated users (keyed by the token's `sub`) and for decoded
+    token payloads (expiring at the token's `exp`). Cached values are shared
+    between requests and must not be mutated.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (expires_at (time.time()), value), least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """
+        Cache a value
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            expires_at: Unix time after which the value is invalid (capped by the TTL)
+        """
+        if self.max_size == 0:
+            return
+
+        deadline = expires_at if expires_at is not None else float("inf")
+        if self.ttl_seconds is not None:
+            deadline = min(deadline, time.time() + self.ttl_seconds)
+
+        self._entries[key] = (deadline, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry (None = drop all)"""
+        if key is None:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+        elif self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache metrics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Authenticated users by id (`sub`); invalidated by User save / update / delete hooks
+user_cache = AuthCache(settings.AUTH_USER_CACHE_SIZE, settings.AUTH_USER_CACHE_TTL_SECONDS)
+# Decoded, signature-checked token payloads, valid until the token's `exp`
+token_cache = AuthCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+def auth_cache_stats() -> Dict[str, Any]:
+    """Metrics of the user and token caches"""
+    return {"users": user_cache.stats(), "tokens": token_cache.stats()}
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against hashed password"""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt"""
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """Hash a password using bcrypt (cost BCRYPT_ROUNDS unless given)"""
     # Truncate password to 72 bytes (bcrypt limitation)
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -48,9 +143,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 def decode_access_token(token: str) -> dict:
     """
     Decode JWT access token
+
+    Valid payloads are memoized until the token's `exp`, so repeat requests
+    skip the signature check; expired tokens always fail.
     """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_cache.set(token, payload, expires_at=payload.get("exp"))
         return payload
     except JWTError:
         raise HTTPException(
@@ -63,6 +166,9 @@ def decode_access_token(token: str) -> dict:
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> User:
     """
     Get current authenticated user from JWT token
+    
+    Users are served from `user_cache` when possible, so most requests
+    authenticate without a database round-trip.
     """
     token = credentials.credentials
     
@@ -83,6 +189,10 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    
     user = await User.get(user_id)
     
     if user is None:
@@ -92,4 +202,16 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    user_cache.set(user_id, user)
     return user
+
+
+def require_admin(current_user: User = Depends(get_current_user)) -> User:
+    """Only users listed in MODEL_ADMIN_USERS may manage models or read metrics"""
+    admins = {name.strip() for name in settings.MODEL_ADMIN_USERS.split(",") if name.strip()}
+    if current_user.username not in admins:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
@@ -1,10 +1,31 @@
 """
 Database utilities for MongoDB
 """
+from typing import Dict, List, Type
 from motor.motor_asyncio import AsyncIOMotorClient
-from beanie import init_beanie
+from beanie import Document, init_beanie
+from pymongo.errors import OperationFailure
 from app.config import settings
-from app.models import User, Prediction, ChatHistory
+from app.models import User, Prediction, ChatHistory, PredictionCacheEntry, PredictionJob
+
+DOCUMENT_MODELS = [User, Prediction, ChatHistory, PredictionCacheEntry, PredictionJob]
+
+# Server error codes of a declared index that cannot be built
+INDEX_BUILD_ERRORS = {
+    11000: "existing documents have duplicate values for a unique index",
+    85: "an index on the same keys exists with different options (e.g. not unique)",
+    86: "an index with the same name exists on different keys",
+}
+
+# Indexes superseded by a declared one: dropped at startup once their
+# replacement exists
+OBSOLETE_INDEXES = {
+    # Replaced by the same prefix plus an _id tiebreaker for keyset pagination
+    "predictions": [(("user_id", 1), ("timestamp", -1))],
+    "chat_history": [(("user_id", 1), ("timestamp", -1))],
+    # TTL on created_at, replaced by the expires_at TTL index
+    "prediction_cache": [(("created_at", 1),)],
+}
 
 
 async def init_db():
@@ -21,18 +42,88 @@ async def init_db():
         # Test connection
         await client.admin.command('ping')
         
-        # Initialize beanie with the Product document class
-        await init_beanie(
-            database=client[settings.DATABASE_NAME],
-            document_models=[User, Prediction, ChatHistory]
-        )
+        # Initialize beanie with the Product document class (also builds
+        # every index declared in the models' Settings.indexes)
+        try:
+            await init_beanie(
+                database=client[settings.DATABASE_NAME],
+                document_models=DOCUMENT_MODELS
+            )
+        except OperationFailure as e:
+            if e.code not in INDEX_BUILD_ERRORS:
+                raise
+            print(f"[ERROR] Declared indexes could not be built: {INDEX_BUILD_ERRORS[e.code]}")
+            print(f"[ERROR] {str(e)[:300]}")
+            print("⚠️  Continuing without database - fix the documents / index above and restart...")
+            return
         
         print(f"✅ Connected to MongoDB database: {settings.DATABASE_NAME}")
+        
+        await verify_indexes(DOCUMENT_MODELS)
     except Exception as e:
         print(f"❌ Database connection failed: {str(e)[:200]}")
         print("⚠️  Continuing without database - some features may not work...")
 
 
+def _key_pattern(keys) -> tuple:
+    """Ordered (field, direction) pairs of an index key specification"""
+    items = keys.items() if hasattr(keys, "items") else keys
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in items)
+
+
+async def verify_indexes(document_models: List[Type[Document]]) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Make sure every index declared in a model's `Settings.indexes` exists
+    
+    Indexes are matched by their ordered key pattern (a compound index only
+    serves the field order it was built with, whatever its name); missing
+    ones are created, then the collection's OBSOLETE_INDEXES are dropped.
+    
+    Args:
+        document_models: Initialized Beanie document classes
+        
+    Returns:
+        Dict: {collection: {"present": [...], "created": [...], "dropped": [...]}}
+    """
+    report = {}
+    for model in document_models:
+        declared = model.get_settings().indexes
+        if not declared:
+            continue
+        
+        collection = model.get_motor_collection()
+        existing = {
+            _key_pattern(info["key"]): name
+            for name, info in (await collection.index_information()).items()
+        }
+        
+        present, missing = [], []
+        for index in declared:
+            pattern = _key_pattern(index.index.document["key"])
+            (present if pattern in existing else missing).append((pattern, index.index))
+        
+        if missing:
+            await collection.create_indexes([index for _, index in missing])
+        
+        obsolete = [pattern for pattern in OBSOLETE_INDEXES.get(collection.name, []) if pattern in existing]
+        for pattern in obsolete:
+            await collection.drop_index(existing[pattern])
+        
+        describe = lambda pattern: ", ".join(f"{field} {direction}" for field, direction in pattern)
+        report[collection.name] = {
+            "present": [describe(pattern) for pattern, _ in present],
+            "created": [describe(pattern) for pattern, _ in missing],
+            "dropped": [describe(pattern) for pattern in obsolete]
+        }
+        for pattern, _ in missing:
+            print(f"⚠️  Created missing index on {collection.name}: ({describe(pattern)})")
+        for pattern in obsolete:
+            print(f"⚠️  Dropped obsolete index on {collection.name}: ({describe(pattern)})")
+    
+    print(f"[OK] Indexes verified on {len(report)} collection(s)")
+    return report
+
+
 async def close_db():
     """
     Close database connection
@@ -0,0 +1,81 @@
+"""
+Keyset Pagination - Opaque (timestamp, _id) Cursors for History Endpoints
+"""
+import base64
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from beanie import Document
+from bson import ObjectId
+from fastapi import HTTPException, status
+
+EPOCH = datetime(1970, 1, 1)
+# Newest first, _id breaking timestamp ties; matches the (user_id, timestamp, _id) indexes
+PAGE_SORT = [("timestamp", -1), ("_id", -1)]
+
+
+def encode_cursor(timestamp: datetime, doc_id: ObjectId) -> str:
+    """Opaque cursor pointing just past the given row"""
+    # Mongo stores milliseconds: integer ms round-trip exactly
+    ms = (timestamp.replace(tzinfo=None) - EPOCH) // timedelta(milliseconds=1)
+    return base64.urlsafe_b64encode(f"{ms}:{doc_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """
+    Parse a cursor from `encode_cursor`
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ms, doc_id = raw.split(":")
+        return EPOCH + timedelta(milliseconds=int(ms)), ObjectId(doc_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+async def fetch_page(
+    model: Type[Document],
+    query: Dict[str, Any],
+    fields: List[str],
+    limit: int,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one page of documents, newest first
+
+    The cursor turns into an index range bound, so every page costs one index
+    seek plus `limit` entries however deep it is. Only `fields` are projected
+    and rows are returned as plain dicts (no document hydration).
+
+    Args:
+        model: Beanie document class whose collection is queried
+        query: Filter (e.g. the owner's user_id)
+        fields: Fields to return besides `_id` and `timestamp`
+        limit: Page size
+        cursor: `next_cursor` of the previous page, None for the first page
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+    """
+    if cursor:
+        timestamp, doc_id = decode_cursor(cursor)
+        query = {
+            **query,
+            "timestamp": {"$lte": timestamp},
+            "$or": [{"timestamp": {"$lt": timestamp}}, {"_id": {"$lt": doc_id}}]
+        }
+
+    projection = {field: 1 for field in ["timestamp", *fields]}
+    rows = await model.get_motor_collection().find(query, projection).sort(PAGE_SORT).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["_id"])
+    return rows, next_cursor
@@ -0,0 +1,52 @@
+"""
+Process resource utilities
+"""
+import os
+import sys
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def memory_usage_mb(pid: Optional[int] = None) -> Optional[Dict[str, float]]:
+    """
+    Current memory breakdown of a process in MB (Linux only, None elsewhere)
+
+    - rss: resident pages, counting shared pages in full
+    - pss: proportional set size, shared pages divided between the processes
+      mapping them (summing PSS over workers gives the real total)
+    - shared: resident pages also mapped by other processes (e.g. mmap'd weights)
+    - private: pages only this process uses
+    """
+    path = f"/proc/{pid or os.getpid()}/smaps_rollup"
+    if not os.path.exists(path):
+        return None
+
+    fields = {}
+    with open(path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+
+    return {
+        "rss": round(fields.get("Rss", 0.0), 1),
+        "pss": round(fields.get("Pss", 0.0), 1),
+        "shared": round(fields.get("Shared_Clean", 0.0) + fields.get("Shared_Dirty", 0.0), 1),
+        "private": round(fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0), 1)
+    }
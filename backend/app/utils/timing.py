@@ -0,0 +1,156 @@
+"""
+Request Stage Timing - Per-Stage Latency Histograms and Server-Timing Header
+"""
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+LATENCY_BUCKETS_MS = [1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class StageTimer:
+    """
+    Monotonic stopwatch for the stages of one request
+
+    Durations of a stage entered more than once (e.g. cache lookup and cache
+    write) are summed. `serialize` is filled in by ServerTimingMiddleware as the
+    time between the handler returning and the response headers being sent.
+    """
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.handler_finished: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        """Add a measured duration to a stage"""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block as `name` (recorded even if it raises)"""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    def handler_done(self):
+        """Mark the end of the route handler; the rest is response serialization"""
+        self.handler_finished = perf_counter()
+
+    def finish(self):
+        """Close the timer once the response is about to be sent"""
+        now = perf_counter()
+        if self.handler_finished is not None:
+            self.add("serialize", now - self.handler_finished)
+        self.stages["total"] = now - self.started
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, durations in milliseconds"""
+        return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.stages.items())
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles"""
+
+    def __init__(self, buckets_ms: Iterable[float] = LATENCY_BUCKETS_MS):
+        self.bounds = list(buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float):
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile, capped at the observed max"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and i < len(self.bounds):
+                return min(self.bounds[i], round(self.max_ms, 2))
+        return round(self.max_ms, 2)
+
+    def snapshot(self) -> Dict[str, Any]:
+        labels = [f"le_{bound:g}" for bound in self.bounds] + ["inf"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum_ms / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+
+class LatencyMetrics:
+    """Per-route, per-stage latency histograms"""
+
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, LatencyHistogram]] = {}
+
+    def record(self, route: str, timer: StageTimer):
+        stages = self._routes.setdefault(route, {})
+        for name, seconds in timer.stages.items():
+            stages.setdefault(name, LatencyHistogram()).observe(seconds * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            route: {name: histogram.snapshot() for name, histogram in stages.items()}
+            for route, stages in self._routes.items()
+        }
+
+
+# Global latency metrics instance
+latency_metrics = LatencyMetrics()
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that attaches a StageTimer to selected routes
+
+    The timer is available to handlers as `request.state.stage_timer` (see
+    `get_stage_timer`). When the response starts, the stages are written to a
+    `Server-Timing` header and aggregated into `latency_metrics`.
+    """
+
+    def __init__(self, app, paths: Iterable[str]):
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        timer = StageTimer()
+        scope.setdefault("state", {})["stage_timer"] = timer
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timer.finish()
+                MutableHeaders(scope=message).append("Server-Timing", timer.server_timing())
+                latency_metrics.record(f"{scope['method']} {scope['path']}", timer)
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
+
+
+def get_stage_timer(request: Request) -> StageTimer:
+    """Dependency returning the request's StageTimer (a detached one outside the middleware)"""
+    timer = getattr(request.state, "stage_timer", None)
+    return timer if timer is not None else StageTimer()
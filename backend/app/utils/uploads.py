@@ -0,0 +1,112 @@
+"""
+Upload Buffering - Read Each Uploaded File Exactly Once
+"""
+import io
+from typing import Dict
+
+from fastapi import HTTPException, UploadFile, status
+from starlette.formparsers import MultiPartParser
+from starlette.responses import JSONResponse
+
+# Room for multipart boundaries and part headers on top of the file bytes
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+def keep_uploads_in_memory(max_bytes: int):
+    """
+    Raise Starlette's multipart spool threshold (1 MB by default) to `max_bytes`
+
+    Accepted uploads then stay in the parser's in-memory buffer instead of
+    being written to a temporary file on disk and read back.
+    """
+    MultiPartParser.max_file_size = max(MultiPartParser.max_file_size, max_bytes)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that caps multipart request bodies before they are parsed
+
+    Starlette parses the whole form (up to 1000 parts, each kept in memory up
+    to the `keep_uploads_in_memory` threshold) before a route can check any
+    size, so the total is checked here from `Content-Length`: `413` above the
+    path's limit (`limits`, else `default`) and `411` without the header.
+    """
+
+    def __init__(self, app, limits: Dict[str, int], default: int):
+        self.app = app
+        self.limits = limits
+        self.default = default
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name: value for name, value in scope["headers"]}
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.get(scope["path"], self.default) + MULTIPART_OVERHEAD_BYTES
+        content_length = headers.get(b"content-length")
+        if content_length is None or not content_length.isdigit():
+            response = JSONResponse(
+                {"detail": "Uploads must be sent with a Content-Length header"},
+                status_code=status.HTTP_411_LENGTH_REQUIRED
+            )
+        elif int(content_length) > limit:
+            response = JSONResponse(
+                {"detail": f"Request body exceeds the maximum upload size of {limit} bytes"},
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        else:
+            await self.app(scope, receive, send)
+            return
+        await response(scope, receive, send)
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read an uploaded file into a single immutable buffer
+
+    The returned `bytes` is the only copy the request keeps: an in-memory
+    multipart spool hands over its buffer and is closed right away,
+    `io.BytesIO(data)` (decoder, zip reader) shares it without copying and
+    `memoryview(data)` gives zero-copy slices. Hashing, the uploader and the
+    outbox consume it as is.
+
+    Args:
+        file: Multipart upload
+        max_bytes: Largest accepted size
+
+    Returns:
+        Raw file content
+
+    Raises:
+        HTTPException: 413 if the file is larger than `max_bytes`
+    """
+    try:
+        # Starlette counts the size while parsing: reject before copying anything
+        if file.size is not None and file.size > max_bytes:
+            raise _too_large(file, max_bytes)
+
+        spool = getattr(file.file, "_file", None)
+        if isinstance(spool, io.BytesIO):
+            # Still in memory: BytesIO hands over its own buffer, no copy at all
+            data = spool.getvalue()
+        else:
+            await file.seek(0)
+            data = await file.read(max_bytes + 1)
+        if len(data) > max_bytes:
+            raise _too_large(file, max_bytes)
+        return data
+    finally:
+        # Free the spooled copy now rather than after the response is sent
+        await file.close()
+
+
+def _too_large(file: UploadFile, max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"{file.filename or 'File'} exceeds the maximum upload size of {max_bytes} bytes"
+    )
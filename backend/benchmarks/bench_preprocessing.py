@@ -0,0 +1,123 @@
+"""
+Preprocessing micro-benchmark and numeric-parity check
+
+Compares the fast ImagePreprocessor against the original torchvision
+Resize -> ToTensor -> Normalize pipeline:
+- parity: with JPEG draft decoding disabled the max deviation must stay within
+  --atol; with draft enabled (reduced-scale DCT decode is lossy) the mean
+  deviation must stay within --draft-atol. The script exits 1 otherwise.
+- speed: mean milliseconds per image for each path
+
+Usage (from backend/):
+    python benchmarks/bench_preprocessing.py
+    python benchmarks/bench_preprocessing.py path/to/xray.jpg --runs 50
+    python benchmarks/bench_preprocessing.py --check    # parity only, no timing
+"""
+import argparse
+import io
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import torch
+from PIL import Image
+from torchvision import transforms
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.inference_backends import IMG_SIZE  # noqa: E402
+from app.services.preprocessing import IMAGENET_MEAN, IMAGENET_STD, ImagePreprocessor  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+SAMPLE_IMAGES = [REPO_ROOT / "test_positive_hand_xray.png", REPO_ROOT / "test_negative_hand_xray.png"]
+
+reference_transform = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=IMAGENET_MEAN, std=IMAGENET_STD)
+])
+
+
+def reference_preprocess(data: bytes) -> torch.Tensor:
+    """Original per-request pipeline"""
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    return reference_transform(image)
+
+
+def synthetic_large(data: bytes, image_format: str, width: int = 2500, height: int = 3000) -> bytes:
+    """Upscale a sample to a multi-megapixel X-ray-sized image"""
+    image = Image.open(io.BytesIO(data)).convert("L").resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, quality=95)
+    return buffer.getvalue()
+
+
+def check_parity(name: str, data: bytes, exact: ImagePreprocessor, fast: ImagePreprocessor,
+                 atol: float, draft_atol: float):
+    """
+    Assert that both preprocessing paths match the reference pipeline
+
+    Returns:
+        (max |diff| of the exact path, mean |diff| of the draft path)
+    """
+    expected = reference_preprocess(data)
+    exact_diff = (exact(data) - expected).abs().max().item()
+    draft_diff = (fast(data) - expected).abs().mean().item()
+    assert exact_diff <= atol, f"{name}: exact path max |diff| {exact_diff:.2e} > {atol}"
+    assert draft_diff <= draft_atol, f"{name}: draft path mean |diff| {draft_diff:.2e} > {draft_atol}"
+    return exact_diff, draft_diff
+
+
+def time_ms(fn, data: bytes, runs: int) -> float:
+    fn(data)  # warm-up
+    start = perf_counter()
+    for _ in range(runs):
+        fn(data)
+    return (perf_counter() - start) * 1000 / runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing")
+    parser.add_argument("images", nargs="*", type=Path, help="Images to benchmark (default: repo samples)")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--atol", type=float, default=1e-4, help="Max |diff| for the exact (no draft) path")
+    parser.add_argument("--draft-atol", type=float, default=0.05, help="Max mean |diff| for the draft path")
+    parser.add_argument("--check", action="store_true", help="Only run the parity check")
+    args = parser.parse_args()
+
+    cases = {}
+    for path in args.images or SAMPLE_IMAGES:
+        cases[path.name] = path.read_bytes()
+    if not args.images:
+        sample = cases[SAMPLE_IMAGES[0].name]
+        cases["synthetic_2500x3000.jpg"] = synthetic_large(sample, "JPEG")
+        cases["synthetic_2500x3000.png"] = synthetic_large(sample, "PNG")
+
+    exact = ImagePreprocessor(draft=False)
+    fast = ImagePreprocessor(draft=True)
+
+    try:
+        diffs = {
+            name: check_parity(name, data, exact, fast, args.atol, args.draft_atol)
+            for name, data in cases.items()
+        }
+    except AssertionError as e:
+        print(f"[ERROR] Fast preprocessing differs from the reference pipeline: {e}")
+        sys.exit(1)
+    print("[OK] Fast preprocessing matches the reference pipeline")
+    if args.check:
+        return
+
+    print(f"\n{'Image':<28} {'ref ms':>8} {'fast ms':>8} {'speedup':>8} {'exact |diff|':>13} {'draft |diff|':>13}")
+    print("-" * 84)
+    for name, data in cases.items():
+        exact_diff, draft_diff = diffs[name]
+        ref_ms = time_ms(reference_preprocess, data, args.runs)
+        fast_ms = time_ms(fast, data, args.runs)
+        print(f"{name:<28} {ref_ms:>8.2f} {fast_ms:>8.2f} {ref_ms / fast_ms:>7.1f}x "
+              f"{exact_diff:>13.2e} {draft_diff:>13.2e}")
+
+    print("\n(draft |diff| is the mean absolute deviation of normalized pixels)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Upload buffering memory benchmark under concurrent uploads
+
+Simulates N uploads handled at the same time and compares two buffering paths:
+- legacy:    the original path - Starlette spools the body (to disk above 1 MB),
+             PIL decodes from the spooled file, the route seeks back and reads
+             the whole file again for the uploader; the spool lives until the
+             response is sent
+- read-once: the current path - the body stays in the in-memory spool up to
+             UPLOAD_MAX_BYTES, is read once into one `bytes` (the spool is
+             closed at once) and the decoder (`io.BytesIO` view), hash and
+             uploader all share that buffer
+
+The Cloudinary request is replaced by a sleep that holds the buffer handed to
+the SDK (after the SDK's own file-parameter handling), so buffers stay alive as
+long as they would in production. Reports the peak Python heap (tracemalloc,
+which includes numpy but not PIL/torch internals), bytes written to disk spool
+files and wall time.
+
+Usage (from backend/):
+    python benchmarks/bench_upload_memory.py
+    python benchmarks/bench_upload_memory.py path/to/xray.jpg --concurrency 32
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import sys
+import tracemalloc
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from time import perf_counter
+
+from cloudinary.utils import handle_file_parameter
+from fastapi import UploadFile
+from PIL import Image
+from starlette.formparsers import MultiPartParser
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.config import settings  # noqa: E402
+from app.services.preprocessing import ImagePreprocessor  # noqa: E402
+from app.utils.uploads import read_upload  # noqa: E402
+
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+SAMPLE_IMAGE = REPO_ROOT / "test_positive_hand_xray.png"
+CHUNK_SIZE = 64 * 1024  # Multipart parser write size
+STARLETTE_SPOOL_BYTES = MultiPartParser.max_file_size
+
+preprocessor = ImagePreprocessor()
+
+
+def synthetic_large(data: bytes, width: int = 2500, height: int = 3000) -> bytes:
+    """Upscale a sample to a multi-megapixel X-ray-sized PNG (with detector-like noise)"""
+    image = Image.open(io.BytesIO(data)).convert("L").resize((width, height), Image.BILINEAR)
+    image = Image.blend(image, Image.effect_noise((width, height), 64), 0.1)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def receive(body: bytes, spool_bytes: int) -> UploadFile:
+    """What the multipart parser does before the route runs"""
+    file = UploadFile(SpooledTemporaryFile(max_size=spool_bytes), size=0, filename="xray.jpg")
+    view = memoryview(body)
+    for offset in range(0, len(body), CHUNK_SIZE):
+        await file.write(view[offset:offset + CHUNK_SIZE])
+    await file.seek(0)
+    return file
+
+
+async def upload(contents, upload_ms: float):
+    """Stand-in for the Cloudinary request: keeps the SDK's buffer alive"""
+    data = handle_file_parameter(contents, None)
+    await asyncio.sleep(upload_ms / 1000)
+    return len(data)
+
+
+async def legacy_request(body: bytes, upload_ms: float) -> bool:
+    file = await receive(body, STARLETTE_SPOOL_BYTES)
+    rolled = file.file._rolled
+    await asyncio.to_thread(preprocessor, file.file)
+    await file.seek(0)
+    contents = await file.read()
+    hashlib.sha256(contents).hexdigest()
+    await upload(contents, upload_ms)
+    await file.close()
+    return rolled
+
+
+async def read_once_request(body: bytes, upload_ms: float) -> bool:
+    file = await receive(body, max(STARLETTE_SPOOL_BYTES, settings.UPLOAD_MAX_BYTES))
+    rolled = file.file._rolled
+    data = await read_upload(file, settings.UPLOAD_MAX_BYTES)
+    hashlib.sha256(data).hexdigest()
+    await asyncio.gather(asyncio.to_thread(preprocessor, data), upload(data, upload_ms))
+    return rolled
+
+
+async def run(handler, body: bytes, concurrency: int, upload_ms: float):
+    tracemalloc.start()
+    start = perf_counter()
+    rolled = await asyncio.gather(*[handler(body, upload_ms) for _ in range(concurrency)])
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20, sum(rolled) * len(body) / 2 ** 20, elapsed * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark upload buffering memory")
+    parser.add_argument("image", nargs="?", type=Path, help="Image to upload (default: synthetic 2500x3000 PNG)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--upload-ms", type=float, default=200.0, help="Simulated Cloudinary latency")
+    args = parser.parse_args()
+
+    body = args.image.read_bytes() if args.image else synthetic_large(SAMPLE_IMAGE.read_bytes())
+    print(f"\nImage {len(body) / 2 ** 20:.2f} MB, {args.concurrency} concurrent uploads")
+
+    # Warm-up (thread pool, decoder)
+    asyncio.run(run(read_once_request, body, 1, 0))
+
+    print(f"\n{'Path':<12} {'peak heap MB':>13} {'MB / upload':>12} {'disk spool MB':>14} {'wall ms':>9}")
+    print("-" * 64)
+    for name, handler in (("legacy", legacy_request), ("read-once", read_once_request)):
+        peak_mb, disk_mb, wall_ms = asyncio.run(run(handler, body, args.concurrency, args.upload_ms))
+        print(f"{name:<12} {peak_mb:>13.1f} {peak_mb / args.concurrency:>12.2f} {disk_mb:>14.1f} {wall_ms:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Multi-worker memory and throughput benchmark
+
+Starts N worker processes the way `uvicorn --workers N` does (spawn, each
+importing and loading the model itself) and compares two layouts:
+- copy:   the original layout - every worker reads the checkpoint into private
+          memory and runs torch with all cores (N x cores threads on the node)
+- shared: the current layout - weights are memory-mapped from the checkpoint,
+          so all workers map the same page-cache pages read-only, and the cores
+          are split between workers
+
+Reports per-worker RSS / PSS / shared MB (PSS summed over workers is the real
+node total) and the aggregate single-image throughput while all workers run.
+Memory columns need Linux (/proc/<pid>/smaps_rollup).
+
+Usage (from backend/):
+    python benchmarks/bench_workers.py --workers 4
+    python benchmarks/bench_workers.py --workers 2 --duration 20 --checkpoint ../models/other.pth
+"""
+import argparse
+import multiprocessing as mp
+import os
+import queue
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import torch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.services.inference_backends import (  # noqa: E402
+    CHECKPOINT_NAME, DEVICE, IMG_SIZE, MODELS_DIR, OptimizedModel, load_checkpoint_model
+)
+from app.utils.system import memory_usage_mb  # noqa: E402
+
+
+def load_copy(path: Path) -> torch.nn.Module:
+    """Original loader: build the model, then copy the checkpoint into it"""
+    model = OptimizedModel().to(DEVICE)
+    checkpoint = torch.load(path, map_location=DEVICE, weights_only=True)
+    model.load_state_dict(checkpoint["model_state"])
+    del checkpoint
+    model.eval()
+    return model
+
+
+def worker(layout, path, threads, duration, barrier, results):
+    torch.set_num_threads(threads)
+    model = load_copy(path) if layout == "copy" else load_checkpoint_model(path)
+
+    x = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    with torch.inference_mode():
+        for _ in range(3):
+            model(x)
+
+        # Every worker is loaded: run concurrently
+        barrier.wait()
+        count = 0
+        start = perf_counter()
+        while perf_counter() - start < duration:
+            model(x)
+            count += 1
+        elapsed = perf_counter() - start
+
+    # Sample memory while every worker is still alive so PSS splits shared pages
+    memory = memory_usage_mb()
+    barrier.wait()
+    results.put((os.getpid(), count / elapsed, memory))
+
+
+def run_layout(layout, path, workers, threads, duration):
+    ctx = mp.get_context("spawn")
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+
+    procs = [
+        ctx.Process(target=worker, args=(layout, path, threads, duration, barrier, results))
+        for _ in range(workers)
+    ]
+    for p in procs:
+        p.start()
+    rows = []
+    while len(rows) < workers:
+        try:
+            rows.append(results.get(timeout=1))
+        except queue.Empty:
+            if any(p.exitcode not in (None, 0) for p in procs):
+                for p in procs:
+                    p.terminate()
+                raise SystemExit(f"[ERROR] A {layout} worker failed")
+    for p in procs:
+        p.join()
+    return rows
+
+
+def report(layout, threads, rows):
+    print(f"\n{layout} layout ({len(rows)} workers x {threads} torch threads)")
+    print(f"{'pid':>8} {'img/s':>8} {'rss MB':>8} {'pss MB':>8} {'shared MB':>10}")
+    for pid, throughput, memory in rows:
+        memory = memory or {}
+        print(
+            f"{pid:>8} {throughput:>8.1f} {memory.get('rss', float('nan')):>8.1f} "
+            f"{memory.get('pss', float('nan')):>8.1f} {memory.get('shared', float('nan')):>10.1f}"
+        )
+
+    total_pss = sum((m or {}).get("pss", 0.0) for _, _, m in rows)
+    total_throughput = sum(t for _, t, _ in rows)
+    print(f"  total: {total_throughput:.1f} img/s, {total_pss:.1f} MB PSS")
+    return total_throughput, total_pss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint", type=Path, default=MODELS_DIR / CHECKPOINT_NAME)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of inference per layout")
+    args = parser.parse_args()
+
+    if not args.checkpoint.exists():
+        print(f"[ERROR] Checkpoint not found: {args.checkpoint}")
+        sys.exit(1)
+
+    cores = os.cpu_count() or 1
+    print(f"Checkpoint: {args.checkpoint} ({args.checkpoint.stat().st_size / (1024 * 1024):.1f} MB), {cores} cores")
+
+    copy_rows = run_layout("copy", args.checkpoint, args.workers, cores, args.duration)
+    copy_throughput, copy_pss = report("copy", cores, copy_rows)
+
+    threads = max(1, cores // args.workers)
+    shared_rows = run_layout("shared", args.checkpoint, args.workers, threads, args.duration)
+    shared_throughput, shared_pss = report("shared", threads, shared_rows)
+
+    print(
+        f"\nshared vs copy: {shared_throughput / copy_throughput:.2f}x throughput, "
+        f"{copy_pss - shared_pss:.1f} MB less memory on the node"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Query-plan regression check for the hot MongoDB queries
+
+Runs `explain` on every per-user query the API serves and fails (exit code 1)
+if a winning plan contains a COLLSCAN (full collection scan) or a blocking
+SORT (in-memory sort), i.e. an index is missing or no longer matches the
+query's filter / sort order.
+
+Needs a running MongoDB (MONGODB_URL). By default it uses a scratch database
+`<DATABASE_NAME>_plan_check`, creates the models' indexes exactly like the
+app's startup does, seeds it with --docs documents per collection and drops
+it afterwards. `--database` checks an existing database in place.
+
+Usage (from backend/):
+    python benchmarks/check_query_plans.py
+    python benchmarks/check_query_plans.py --database raicare_db
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from beanie import init_beanie
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from app.config import settings  # noqa: E402
+from app.models import ChatHistory, JobStatus, Prediction, PredictionJob, User  # noqa: E402
+from app.utils.database import DOCUMENT_MODELS, verify_indexes  # noqa: E402
+from app.utils.pagination import PAGE_SORT  # noqa: E402
+
+USER_ID = "plan-check-user-0"
+# Keyset bound of a deep page (what a `cursor` turns into)
+DEEP_PAGE = {
+    "user_id": USER_ID,
+    "timestamp": {"$lte": datetime(2000, 1, 1)},
+    "$or": [{"timestamp": {"$lt": datetime(2000, 1, 1)}}, {"_id": {"$lt": ObjectId("0" * 24)}}]
+}
+# Plan stages that mean the query is not served by an index
+BAD_STAGES = {"COLLSCAN", "SORT"}
+
+# (endpoint(s), model, filter, sort, limit) - mirrors the route queries
+HOT_QUERIES = [
+    ("GET /prediction/history", Prediction, {"user_id": USER_ID}, PAGE_SORT, 11),
+    ("GET /prediction/history?cursor=...", Prediction, DEEP_PAGE, PAGE_SORT, 11),
+    ("GET /prediction/latest, /chat/send, /chat/welcome", Prediction, {"user_id": USER_ID}, [("timestamp", -1)], 1),
+    ("GET /chat/history", ChatHistory, {"user_id": USER_ID}, PAGE_SORT, 21),
+    ("GET /chat/history?cursor=...", ChatHistory, DEEP_PAGE, PAGE_SORT, 21),
+    ("DELETE /chat/clear", ChatHistory, {"user_id": USER_ID}, None, 0),
+    ("POST /auth/login", User, {"email": "plan-check-user-0@example.com"}, None, 1),
+    ("prediction job recovery", PredictionJob, {"status": JobStatus.QUEUED.value}, [("created_at", 1)], 0),
+]
+
+
+def plan_stages(plan: dict):
+    """All stage names of an explain plan tree (classic and slot-based engine)"""
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from plan_stages(child)
+
+
+async def seed(docs: int, users: int = 20):
+    now = datetime.utcnow()
+    await Prediction.get_motor_collection().insert_many([
+        {
+            "user_id": f"plan-check-user-{i % users}",
+            "image_url": None,
+            "result_percentage": float(i % 100),
+            "severity_level": "none",
+            "timestamp": now - timedelta(minutes=i)
+        }
+        for i in range(docs)
+    ])
+    await ChatHistory.get_motor_collection().insert_many([
+        {
+            "user_id": f"plan-check-user-{i % users}",
+            "message": "question",
+            "response": "answer",
+            "timestamp": now - timedelta(minutes=i)
+        }
+        for i in range(docs)
+    ])
+    await User.get_motor_collection().insert_many([
+        {
+            "username": f"plan-check-user-{i}",
+            "email": f"plan-check-user-{i}@example.com",
+            "hashed_password": "x",
+            "created_at": now
+        }
+        for i in range(users)
+    ])
+    await PredictionJob.get_motor_collection().insert_many([
+        {
+            "user_id": f"plan-check-user-{i % users}",
+            "status": JobStatus.COMPLETED.value if i % 10 else JobStatus.QUEUED.value,
+            "attempts": 0,
+            "created_at": now - timedelta(minutes=i)
+        }
+        for i in range(docs)
+    ])
+
+
+async def check(database: str, docs: int, scratch: bool) -> bool:
+    client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=3000)
+    await client.admin.command("ping")
+
+    try:
+        await init_beanie(database=client[database], document_models=DOCUMENT_MODELS)
+        await verify_indexes(DOCUMENT_MODELS)
+        if scratch:
+            await seed(docs)
+
+        ok = True
+        print(f"\n{'Query':<52} {'Plan':<40} Result")
+        print("-" * 102)
+        for name, model, query, sort, limit in HOT_QUERIES:
+            cursor = model.get_motor_collection().find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(limit)
+            explain = await cursor.explain()
+
+            stages = list(plan_stages(explain["queryPlanner"]["winningPlan"]))
+            bad = BAD_STAGES.intersection(stages)
+            ok = ok and not bad
+            print(f"{name:<52} {' <- '.join(stages):<40} {'FAIL' if bad else 'OK'}")
+        return ok
+    finally:
+        if scratch:
+            await client.drop_database(database)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if a hot query needs a COLLSCAN or in-memory SORT")
+    parser.add_argument("--database", help="Check an existing database instead of a seeded scratch one")
+    parser.add_argument("--docs", type=int, default=2000, help="Documents per collection in the scratch database")
+    args = parser.parse_args()
+
+    database = args.database or f"{settings.DATABASE_NAME}_plan_check"
+    ok = asyncio.run(check(database, args.docs, scratch=args.database is None))
+
+    if not ok:
+        print("\n[ERROR] Hot queries fall back to a collection scan or in-memory sort - check Settings.indexes")
+        sys.exit(1)
+    print("\n[OK] Every hot query is served by an index")
+
+
+if __name__ == "__main__":
+    main()
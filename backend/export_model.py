@@ -0,0 +1,128 @@
+"""
+Export the trained ResNet50 checkpoint for the optimized inference backends
+
+Turns models/ensemble_model_best.pth into:
+- ensemble_model_best.ts    (traced + frozen TorchScript, INFERENCE_BACKEND=torchscript)
+- ensemble_model_best.onnx  (ONNX for ONNX Runtime, INFERENCE_BACKEND=onnx)
+
+Then checks that every backend produces the same logits as eager PyTorch
+(within --atol) and prints per-image latency for each engine.
+
+Usage:
+    python export_model.py
+    python export_model.py --formats onnx --atol 1e-4
+    python export_model.py --check-only
+"""
+import argparse
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import torch
+
+from app.services.inference_backends import (
+    BACKENDS,
+    CHECKPOINT_NAME,
+    IMG_SIZE,
+    MODELS_DIR,
+    OnnxRuntimeBackend,
+    TorchScriptBackend,
+    load_backend,
+    load_checkpoint_model
+)
+
+EXPORT_FORMATS = [TorchScriptBackend.name, OnnxRuntimeBackend.name]
+
+
+def export_torchscript(model: torch.nn.Module, example: torch.Tensor, output_path: Path):
+    """Trace, freeze and save a TorchScript module"""
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example)
+        frozen = torch.jit.freeze(traced)
+    frozen.save(str(output_path))
+
+
+def export_onnx(model: torch.nn.Module, example: torch.Tensor, output_path: Path):
+    """Export an ONNX graph with a dynamic batch dimension"""
+    torch.onnx.export(
+        model,
+        (example,),
+        str(output_path),
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+        dynamo=False
+    )
+
+
+def check_equivalence(checkpoint_path: Path, backends, atol: float, batch_size: int, runs: int) -> bool:
+    """
+    Compare each backend's logits with eager PyTorch and time them
+
+    Returns:
+        True if every backend is within tolerance
+    """
+    torch.manual_seed(0)
+    batch = torch.randn(batch_size, 3, IMG_SIZE, IMG_SIZE)
+
+    reference = load_backend("eager", checkpoint_path)
+    expected = reference(batch)
+
+    ok = True
+    print(f"\n{'Backend':<14} {'Max |diff|':<14} {'ms / image':<12} {'Status':<8}")
+    print("-" * 52)
+    for name in ["eager"] + list(backends):
+        engine = reference if name == "eager" else load_backend(name, checkpoint_path)
+
+        # Warm-up (graph optimization / JIT profiling)
+        logits = engine(batch)
+        start = perf_counter()
+        for _ in range(runs):
+            engine(batch)
+        per_image_ms = (perf_counter() - start) * 1000 / (runs * batch_size)
+
+        diff = (logits - expected).abs().max().item()
+        passed = diff <= atol
+        ok = ok and passed
+        print(f"{name:<14} {diff:<14.2e} {per_image_ms:<12.2f} {'OK' if passed else 'FAIL':<8}")
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export RA detection model for optimized inference backends")
+    parser.add_argument("--checkpoint", type=Path, default=MODELS_DIR / CHECKPOINT_NAME)
+    parser.add_argument("--formats", nargs="+", choices=EXPORT_FORMATS, default=EXPORT_FORMATS)
+    parser.add_argument("--atol", type=float, default=1e-3, help="Max allowed absolute logit difference")
+    parser.add_argument("--batch-size", type=int, default=4, help="Batch size for the equivalence check")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per backend")
+    parser.add_argument("--check-only", action="store_true", help="Skip export, only verify existing artifacts")
+    args = parser.parse_args()
+
+    if not args.checkpoint.exists():
+        print(f"[ERROR] Checkpoint not found at {args.checkpoint}")
+        sys.exit(1)
+
+    if not args.check_only:
+        model = load_checkpoint_model(args.checkpoint).cpu()
+        example = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+
+        exporters = {
+            TorchScriptBackend.name: export_torchscript,
+            OnnxRuntimeBackend.name: export_onnx,
+        }
+        for name in args.formats:
+            output_path = BACKENDS[name].artifact_for(args.checkpoint)
+            exporters[name](model, example, output_path)
+            print(f"[OK] Exported {name} model to {output_path}")
+
+    if not check_equivalence(args.checkpoint, args.formats, args.atol, args.batch_size, args.runs):
+        print(f"\n[ERROR] Logits differ from eager PyTorch by more than {args.atol}")
+        sys.exit(1)
+
+    print("\n[OK] All backends match eager PyTorch")
+
+
+if __name__ == "__main__":
+    main()
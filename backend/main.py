@@ -4,17 +4,28 @@ Medical AI Web App for Rheumatoid Arthritis Detection
 
 Features:
 - JWT Authentication (Register/Login)
-- X-ray Image Upload with Cloudinary
+- X-ray Image Upload (Cloudinary, local filesystem or S3-compatible storage)
 - RA Prediction Storage
 - AI Chatbot with Gemini (Personalized Recommendations)
 - MongoDB Database
 """
 from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.utils import init_db, close_db
-from app.routes import auth_router, prediction_router, chat_router
+from app.utils import init_db, close_db, ServerTimingMiddleware, keep_uploads_in_memory, UploadSizeLimitMiddleware
+from app.routes import auth_router, prediction_router, chat_router, metrics_router, models_router
+from app.services.prediction_service import prediction_service
+from app.services.inference_executor import inference_executor
+from app.services.model_registry import model_registry
+from app.services.prediction_jobs import prediction_jobs
+from app.services.cloudinary_service import upload_executor
+from app.services.image_outbox import image_outbox
+from app.services.image_storage import image_storage, LocalImageStorage
+from app.services.image_derivatives import image_derivatives
+from app.services.latest_prediction_cache import latest_predictions
+from app.services.password_hasher import password_hasher
 
 
 @asynccontextmanager
@@ -56,11 +67,27 @@ async def lifespan(app: FastAPI):
         print(f"❌ Database initialization failed: {e}")
         print("Continuing without database...")
     
+    await prediction_service.batcher.start()
+    await prediction_jobs.start()
+    await image_outbox.start()
+    await image_derivatives.start()
+    await latest_predictions.start()
+    await model_registry.start_watching()
+    
     print("✅ Application ready!")
     
     yield
     
     print("🛑 Shutting down...")
+    await model_registry.stop_watching()
+    await prediction_jobs.stop()
+    await image_outbox.stop()
+    await image_derivatives.stop()
+    await latest_predictions.stop()
+    await prediction_service.batcher.stop()
+    inference_executor.shutdown()
+    upload_executor.shutdown(wait=False, cancel_futures=True)
+    password_hasher.shutdown()
     try:
         await close_db()
     except Exception as e:
@@ -76,6 +103,15 @@ app = FastAPI(
 )
 
 
+# Cap multipart bodies before parsing: in-memory spools are bounded by the
+# request size, not by the number of parts (registered before CORS so the
+# 411 / 413 responses still carry CORS headers)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={"/prediction/batch": settings.BATCH_MAX_TOTAL_BYTES},
+    default=settings.UPLOAD_MAX_BYTES
+)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
@@ -83,13 +119,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# Per-stage latency: Server-Timing header + histograms at /metrics
+app.add_middleware(
+    ServerTimingMiddleware,
+    paths=["/prediction/upload", "/prediction/batch"]
+)
+
+# Buffer accepted uploads in memory: each image is read exactly once
+keep_uploads_in_memory(settings.UPLOAD_MAX_BYTES)
+
 
 # Register routers
 app.include_router(auth_router)
 app.include_router(prediction_router)
 app.include_router(chat_router)
+app.include_router(metrics_router)
+app.include_router(models_router)
+
+# Local image storage is served by the backend itself
+if isinstance(image_storage, LocalImageStorage):
+    app.mount("/images", StaticFiles(directory=image_storage.directory), name="images")
 
 
 @app.get("/")
@@ -103,8 +155,10 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "auth": "/auth/register, /auth/login",
-            "predictions": "/prediction/upload, /prediction/history, /prediction/latest",
+            "predictions": "/prediction/upload, /prediction/batch, /prediction/jobs/{id}, /prediction/history, /prediction/latest",
             "chat": "/chat/send, /chat/history, /chat/welcome, /chat/clear",
+            "models": "/models, /models/activate",
+            "metrics": "/metrics",
             "docs": "/docs"
         }
     }
@@ -128,5 +182,6 @@ if __name__ == "__main__":
         "main:app",
         host="localhost",
         port=8000,
-        reload=False  # Disable reload to avoid multiprocessing issues
+        reload=False,  # Disable reload to avoid multiprocessing issues
+        workers=settings.WEB_CONCURRENCY
     )
@@ -0,0 +1,210 @@
+"""
+INT8 quantization of the trained ResNet50 checkpoint for CPU serving
+
+- Conv trunk: post-training static quantization, calibrated on a sample of the
+  MURA XR_HAND validation set (read with XRayDataset from train_ensemble_model.py)
+- fc head: dynamic quantization
+- accuracy vs fp32 is measured on validation images disjoint from the
+  calibration sample
+
+Writes next to the checkpoint:
+- ensemble_model_best.int8.ts    (frozen TorchScript, INFERENCE_BACKEND=int8)
+- ensemble_model_best.int8.json  (latency, model size, accuracy vs fp32 and the
+  artifact's SHA-256)
+
+The backend refuses to load the INT8 model if the recorded accuracy drop
+exceeds QUANTIZED_MAX_ACCURACY_DROP, if fewer than QUANTIZED_MIN_EVAL_SAMPLES
+images were evaluated, or if the report belongs to a different artifact.
+
+Usage:
+    python quantize_model.py
+    python quantize_model.py --calibration-samples 100 --eval-samples 0
+"""
+import argparse
+import io
+import json
+import random
+import sys
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+import torch
+from torch.ao.quantization import QConfigMapping, default_dynamic_qconfig, get_default_qconfig
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+from torch.utils.data import DataLoader, Subset
+from torchvision import transforms
+
+from app.config import settings
+from app.services.inference_backends import (
+    CHECKPOINT_NAME,
+    IMG_SIZE,
+    MODELS_DIR,
+    QuantizedBackend,
+    file_digest,
+    load_checkpoint_model
+)
+
+# XRayDataset lives with the training script at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from train_ensemble_model import VALID_CSV, XRayDataset  # noqa: E402
+
+QUANTIZED_ENGINE = "x86"
+
+valid_transform = transforms.Compose([
+    transforms.Resize((IMG_SIZE, IMG_SIZE)),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                         std=[0.229, 0.224, 0.225])
+])
+
+
+def quantize(model: torch.nn.Module, calibration_loader: DataLoader) -> torch.nn.Module:
+    """Static INT8 quantization of the trunk, dynamic quantization of the fc head"""
+    qconfig_mapping = (
+        QConfigMapping()
+        .set_global(get_default_qconfig(QUANTIZED_ENGINE))
+        .set_module_name("resnet.fc", default_dynamic_qconfig)
+    )
+    example_inputs = (torch.randn(1, 3, IMG_SIZE, IMG_SIZE),)
+    prepared = prepare_fx(model, qconfig_mapping, example_inputs)
+
+    print(f"Calibrating on {len(calibration_loader.dataset)} images...")
+    with torch.no_grad():
+        for images, _ in calibration_loader:
+            prepared(images)
+
+    return convert_fx(prepared)
+
+
+def to_torchscript(model: torch.nn.Module) -> torch.jit.ScriptModule:
+    """Trace and freeze a model for serving"""
+    with torch.no_grad():
+        traced = torch.jit.trace(model, torch.randn(1, 3, IMG_SIZE, IMG_SIZE))
+    return torch.jit.freeze(traced)
+
+
+def serialized_size_mb(module: torch.jit.ScriptModule) -> float:
+    buffer = io.BytesIO()
+    torch.jit.save(module, buffer)
+    return buffer.getbuffer().nbytes / (1024 * 1024)
+
+
+def evaluate(model, loader: DataLoader) -> float:
+    """Validation accuracy in percent"""
+    correct = 0
+    total = 0
+    with torch.no_grad():
+        for images, labels in loader:
+            predicted = torch.argmax(model(images), dim=1)
+            correct += (predicted == labels).sum().item()
+            total += labels.size(0)
+    return 100 * correct / total
+
+
+def latency_ms(model, runs: int) -> float:
+    """Mean batch-size-1 latency in milliseconds"""
+    image = torch.randn(1, 3, IMG_SIZE, IMG_SIZE)
+    with torch.no_grad():
+        for _ in range(3):  # warm-up
+            model(image)
+        start = perf_counter()
+        for _ in range(runs):
+            model(image)
+    return (perf_counter() - start) * 1000 / runs
+
+
+def split(dataset, calibration_count: int, eval_count: int, seed: int):
+    """
+    Disjoint random calibration and evaluation subsets of a dataset
+
+    Args:
+        calibration_count: Calibration images (taken first)
+        eval_count: Evaluation images from the rest (<= 0 means all of the rest)
+
+    Returns:
+        (calibration Subset, evaluation Subset)
+    """
+    indices = list(range(len(dataset)))
+    random.Random(seed).shuffle(indices)
+    calibration = indices[:calibration_count]
+    rest = indices[calibration_count:]
+    evaluation = rest if eval_count <= 0 else rest[:eval_count]
+    return Subset(dataset, calibration), Subset(dataset, evaluation)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 quantization of the RA detection model")
+    parser.add_argument("--checkpoint", type=Path, default=MODELS_DIR / CHECKPOINT_NAME)
+    parser.add_argument("--valid-csv", type=Path, default=VALID_CSV)
+    parser.add_argument("--calibration-samples", type=int, default=200)
+    parser.add_argument("--eval-samples", type=int, default=0,
+                        help="0 = every validation image not used for calibration")
+    parser.add_argument("--latency-runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if not args.checkpoint.exists():
+        print(f"[ERROR] Checkpoint not found at {args.checkpoint}")
+        sys.exit(1)
+
+    torch.backends.quantized.engine = QUANTIZED_ENGINE
+
+    valid_dataset = XRayDataset(args.valid_csv, transform=valid_transform)
+    calibration_set, eval_set = split(valid_dataset, args.calibration_samples, args.eval_samples, args.seed)
+    if len(eval_set) < settings.QUANTIZED_MIN_EVAL_SAMPLES:
+        print(f"[ERROR] Only {len(eval_set)} validation images left for evaluation; the int8 backend "
+              f"requires QUANTIZED_MIN_EVAL_SAMPLES={settings.QUANTIZED_MIN_EVAL_SAMPLES}. "
+              f"Lower --calibration-samples or raise --eval-samples")
+        sys.exit(1)
+    calibration_loader = DataLoader(calibration_set, batch_size=16, shuffle=False)
+    eval_loader = DataLoader(eval_set, batch_size=16, shuffle=False)
+
+    fp32_model = load_checkpoint_model(args.checkpoint).cpu()
+    int8_model = quantize(load_checkpoint_model(args.checkpoint).cpu(), calibration_loader)
+
+    fp32_script = to_torchscript(fp32_model)
+    int8_script = to_torchscript(int8_model)
+
+    print("Evaluating fp32 and int8 accuracy...")
+    fp32_accuracy = evaluate(fp32_script, eval_loader)
+    int8_accuracy = evaluate(int8_script, eval_loader)
+
+    report = {
+        "checkpoint": args.checkpoint.name,
+        "engine": QUANTIZED_ENGINE,
+        "calibration_samples": len(calibration_loader.dataset),
+        "eval_samples": len(eval_loader.dataset),
+        "fp32_accuracy": round(fp32_accuracy, 2),
+        "int8_accuracy": round(int8_accuracy, 2),
+        "accuracy_drop": round(fp32_accuracy - int8_accuracy, 2),
+        "fp32_latency_ms": round(latency_ms(fp32_script, args.latency_runs), 2),
+        "int8_latency_ms": round(latency_ms(int8_script, args.latency_runs), 2),
+        "fp32_size_mb": round(serialized_size_mb(fp32_script), 2),
+        "int8_size_mb": round(serialized_size_mb(int8_script), 2),
+        "created_at": datetime.now().isoformat()
+    }
+
+    artifact_path = QuantizedBackend.artifact_for(args.checkpoint)
+    report_path = QuantizedBackend.report_for(args.checkpoint)
+    int8_script.save(str(artifact_path))
+    # Ties the report to this exact artifact
+    report["artifact_sha256"] = file_digest(artifact_path)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "=" * 60)
+    print("INT8 QUANTIZATION REPORT")
+    print("=" * 60)
+    print(f"{'':<12} {'fp32':>12} {'int8':>12}")
+    print(f"{'Accuracy %':<12} {report['fp32_accuracy']:>12.2f} {report['int8_accuracy']:>12.2f}")
+    print(f"{'Latency ms':<12} {report['fp32_latency_ms']:>12.2f} {report['int8_latency_ms']:>12.2f}")
+    print(f"{'Size MB':<12} {report['fp32_size_mb']:>12.2f} {report['int8_size_mb']:>12.2f}")
+    print(f"Accuracy drop: {report['accuracy_drop']:.2f} points")
+    print(f"Model saved: {artifact_path}")
+    print(f"Report saved: {report_path}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Student Distillation: ResNet18 student trained from the ResNet50 teacher
+Used as the first stage of the backend's confidence-gated cascade
+"""
+
+import json
+from datetime import datetime
+from time import perf_counter
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+import torch.optim as optim
+from torch.utils.data import DataLoader
+from torchvision import transforms, models
+
+from train_ensemble_model import (
+    DEVICE,
+    IMG_SIZE,
+    MODELS_DIR,
+    TRAIN_CSV,
+    VALID_CSV,
+    OptimizedModel,
+    XRayDataset
+)
+
+# Configuration
+BATCH_SIZE = 16
+EPOCHS = 8
+LEARNING_RATE = 0.001
+TEMPERATURE = 4.0  # Softens teacher logits so the student learns relative confidences
+ALPHA = 0.7  # Weight of the distillation loss vs. the hard-label loss
+TEACHER_CHECKPOINT = MODELS_DIR / "ensemble_model_best.pth"
+STUDENT_CHECKPOINT = MODELS_DIR / "student_model_best.pth"
+REPORT_PATH = MODELS_DIR / "student_model_best.json"
+# Uncertainty bands evaluated for the cascade report (escalate if margin < band)
+MARGIN_BANDS = [0.0, 0.2, 0.4, 0.5, 0.6, 0.8, 0.9, 1.01]
+LATENCY_RUNS = 30
+
+
+class StudentModel(nn.Module):
+    """Lightweight ResNet18 student with the same head layout as the teacher"""
+
+    def __init__(self, num_classes=2):
+        super(StudentModel, self).__init__()
+
+        self.resnet = models.resnet18(pretrained=True)
+
+        # Replace classifier
+        self.resnet.fc = nn.Sequential(
+            nn.Dropout(0.5),
+            nn.Linear(512, num_classes)
+        )
+
+    def forward(self, x):
+        return self.resnet(x)
+
+
+def distillation_loss(student_logits, teacher_logits, labels):
+    """Hinton KD loss: soft teacher targets at TEMPERATURE plus hard-label CE"""
+    soft = F.kl_div(
+        F.log_softmax(student_logits / TEMPERATURE, dim=1),
+        F.softmax(teacher_logits / TEMPERATURE, dim=1),
+        reduction="batchmean"
+    ) * (TEMPERATURE ** 2)
+    hard = F.cross_entropy(student_logits, labels)
+    return ALPHA * soft + (1 - ALPHA) * hard
+
+
+def train_epoch(student, teacher, train_loader, optimizer, device):
+    """Distill for one epoch"""
+    student.train()
+    total_loss = 0.0
+    correct = 0
+    total = 0
+
+    for i, (images, labels) in enumerate(train_loader):
+        images, labels = images.to(device), labels.to(device)
+
+        with torch.no_grad():
+            teacher_logits = teacher(images)
+
+        outputs = student(images)
+        loss = distillation_loss(outputs, teacher_logits, labels)
+
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+
+        total_loss += loss.item()
+        _, predicted = torch.max(outputs.data, 1)
+        total += labels.size(0)
+        correct += (predicted == labels).sum().item()
+
+        if (i + 1) % 10 == 0 or i == len(train_loader) - 1:
+            print(f"  Batch {i+1:3d}/{len(train_loader):3d} | Loss: {loss.item():.4f} | Acc: {100 * correct / total:.2f}%")
+
+    return total_loss / len(train_loader), 100 * correct / total
+
+
+def collect_probs(model, loader, device):
+    """Softmax probabilities and labels for a whole loader"""
+    model.eval()
+    all_probs, all_labels = [], []
+    with torch.no_grad():
+        for images, labels in loader:
+            all_probs.append(torch.softmax(model(images.to(device)), dim=1).cpu())
+            all_labels.append(labels)
+    return torch.cat(all_probs), torch.cat(all_labels)
+
+
+def measure_latency_ms(model, device):
+    """Mean single-image forward latency in milliseconds"""
+    model.eval()
+    x = torch.randn(1, 3, IMG_SIZE, IMG_SIZE, device=device)
+    with torch.no_grad():
+        for _ in range(3):
+            model(x)
+        start = perf_counter()
+        for _ in range(LATENCY_RUNS):
+            model(x)
+    return (perf_counter() - start) / LATENCY_RUNS * 1000
+
+
+def cascade_report(student_probs, teacher_probs, labels, student_ms, teacher_ms):
+    """Escalation rate, accuracy and latency of the cascade for each uncertainty band"""
+    margin = (student_probs[:, 1] - student_probs[:, 0]).abs()
+    student_pred = student_probs.argmax(dim=1)
+    teacher_pred = teacher_probs.argmax(dim=1)
+
+    rows = []
+    for band in MARGIN_BANDS:
+        escalate = margin < band
+        cascade_pred = torch.where(escalate, teacher_pred, student_pred)
+        escalation_rate = escalate.float().mean().item()
+        cascade_ms = student_ms + escalation_rate * teacher_ms
+        rows.append({
+            "margin_band": band,
+            "escalation_rate": round(escalation_rate, 4),
+            "accuracy": round(100 * (cascade_pred == labels).float().mean().item(), 2),
+            "agreement_with_teacher": round(100 * (cascade_pred == teacher_pred).float().mean().item(), 2),
+            "latency_ms": round(cascade_ms, 2),
+            "latency_saved_ms": round(teacher_ms - cascade_ms, 2)
+        })
+    return rows
+
+
+def main():
+    print("\n" + "="*60)
+    print("STUDENT DISTILLATION: ResNet18 <- ResNet50")
+    print("="*60)
+
+    train_transform = transforms.Compose([
+        transforms.Resize((IMG_SIZE, IMG_SIZE)),
+        transforms.RandomHorizontalFlip(p=0.5),
+        transforms.RandomRotation(15),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                           std=[0.229, 0.224, 0.225])
+    ])
+
+    valid_transform = transforms.Compose([
+        transforms.Resize((IMG_SIZE, IMG_SIZE)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406],
+                           std=[0.229, 0.224, 0.225])
+    ])
+
+    print("\nLoading datasets...")
+    try:
+        train_dataset = XRayDataset(TRAIN_CSV, transform=train_transform)
+        valid_dataset = XRayDataset(VALID_CSV, transform=valid_transform)
+    except Exception as e:
+        print(f"Error loading datasets: {e}")
+        return
+
+    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True)
+    valid_loader = DataLoader(valid_dataset, batch_size=BATCH_SIZE, shuffle=False)
+
+    print(f"\nLoading teacher from {TEACHER_CHECKPOINT}...")
+    teacher = OptimizedModel(num_classes=2).to(DEVICE)
+    checkpoint = torch.load(TEACHER_CHECKPOINT, map_location=DEVICE, weights_only=True)
+    teacher.load_state_dict(checkpoint['model_state'])
+    teacher.eval()
+
+    student = StudentModel(num_classes=2).to(DEVICE)
+    optimizer = optim.Adam(student.parameters(), lr=LEARNING_RATE)
+    scheduler = optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=EPOCHS, eta_min=1e-6)
+
+    best_valid_acc = 0.0
+    total_start = perf_counter()
+
+    for epoch in range(EPOCHS):
+        epoch_start = perf_counter()
+        train_loss, train_acc = train_epoch(student, teacher, train_loader, optimizer, DEVICE)
+        student_probs, labels = collect_probs(student, valid_loader, DEVICE)
+        valid_acc = 100 * (student_probs.argmax(dim=1) == labels).float().mean().item()
+        scheduler.step()
+
+        print(f"Epoch {epoch+1:2d}/{EPOCHS} | "
+              f"Train Loss: {train_loss:.4f} | Train Acc: {train_acc:.2f}% | "
+              f"Valid Acc: {valid_acc:.2f}% | Time: {perf_counter() - epoch_start:.1f}s")
+
+        if valid_acc > best_valid_acc:
+            best_valid_acc = valid_acc
+            torch.save({
+                'model_state': student.state_dict(),
+                'best_valid_acc': best_valid_acc,
+                'epoch': epoch + 1,
+                'arch': 'resnet18'
+            }, STUDENT_CHECKPOINT)
+            print(f"  ✓ Best student saved (Valid Acc: {valid_acc:.2f}%)")
+
+    # Cascade report on the best student
+    print("\nBuilding cascade report...")
+    checkpoint = torch.load(STUDENT_CHECKPOINT, map_location=DEVICE, weights_only=True)
+    student.load_state_dict(checkpoint['model_state'])
+
+    student_probs, labels = collect_probs(student, valid_loader, DEVICE)
+    teacher_probs, _ = collect_probs(teacher, valid_loader, DEVICE)
+    student_ms = measure_latency_ms(student, DEVICE)
+    teacher_ms = measure_latency_ms(teacher, DEVICE)
+    rows = cascade_report(student_probs, teacher_probs, labels, student_ms, teacher_ms)
+
+    report = {
+        "student_checkpoint": STUDENT_CHECKPOINT.name,
+        "teacher_checkpoint": TEACHER_CHECKPOINT.name,
+        "student_accuracy": round(best_valid_acc, 2),
+        "teacher_accuracy": round(100 * (teacher_probs.argmax(dim=1) == labels).float().mean().item(), 2),
+        "student_latency_ms": round(student_ms, 2),
+        "teacher_latency_ms": round(teacher_ms, 2),
+        "device": str(DEVICE),
+        "bands": rows,
+        "timestamp": datetime.now().isoformat()
+    }
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\nStudent {student_ms:.1f} ms vs teacher {teacher_ms:.1f} ms per image ({DEVICE})")
+    print(f"{'band':>6} {'escalated':>10} {'accuracy':>9} {'latency':>9} {'saved':>8}")
+    for row in rows:
+        print(f"{row['margin_band']:>6.2f} {100 * row['escalation_rate']:>9.1f}% "
+              f"{row['accuracy']:>8.2f}% {row['latency_ms']:>7.1f}ms {row['latency_saved_ms']:>6.1f}ms")
+
+    print("\n" + "="*60)
+    print(f"Best Student Accuracy: {best_valid_acc:.2f}%")
+    print(f"Total Time: {(perf_counter() - total_start)/60:.1f} minutes")
+    print(f"Saved: {STUDENT_CHECKPOINT}")
+    print(f"Report: {REPORT_PATH}")
+    print("Enable in the backend with CASCADE_ENABLED=true and pick CASCADE_UNCERTAINTY_MARGIN from the report")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,11 @@ export const chatService = {
     return response.data;
   },
 
-  // Get chat history
-  getHistory: async (limit = 20) => {
-    const response = await api.get(`/chat/history?limit=${limit}`);
+  // Get chat history (pass data.next_cursor to get the next page)
+  getHistory: async (limit = 20, cursor = null) => {
+    const params = { limit };
+    if (cursor) params.cursor = cursor;
+    const response = await api.get('/chat/history', { params });
     return response.data;
   },
 
@@ -15,9 +15,11 @@ export const predictionService = {
     return response.data;
   },
 
-  // Get prediction history
-  getHistory: async (limit = 10) => {
-    const response = await api.get(`/prediction/history?limit=${limit}`);
+  // Get prediction history (pass data.next_cursor to get the next page)
+  getHistory: async (limit = 10, cursor = null) => {
+    const params = { limit };
+    if (cursor) params.cursor = cursor;
+    const response = await api.get('/prediction/history', { params });
     return response.data;
   },
 
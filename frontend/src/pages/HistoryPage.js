@@ -113,7 +113,7 @@ function HistoryPage() {
                           <span className="detail-value">{prediction.result_percentage}%</span>
                         </div>
                         <div className="xray-preview">
-                          <img src={prediction.image_url} alt={`X-ray ${idx + 1}`} />
+                          <img src={prediction.thumbnail_url || prediction.image_url} alt={`X-ray ${idx + 1}`} loading="lazy" />
                         </div>
                       </div>
                     </div>